@@ -1,30 +1,345 @@
 import os
-from flask import Flask, render_template, request, jsonify, redirect, url_for
+import json
+import hashlib
+import tempfile
+import threading
+from datetime import datetime, timezone
+from flask import Flask, Request, current_app, render_template, request, jsonify, redirect, url_for, make_response, Response, stream_with_context, send_from_directory
 from werkzeug.utils import secure_filename
 from app.utils.weed_detector import WeedDetector
-from app.utils.report_generator import generate_report
-from app.utils.document_analyzer import analyze_document
+from app.utils.report_generator import render_report
+from app.utils.report_store import ReportStore
+from app.utils.document_pool import DocumentAnalysisPool
+from app.utils.job_queue import JobQueue, QueueFullError
+from app.utils.result_cache import ResultCache
+from app.utils.image_frame import ImageFrame
+from app.utils.storage_sweeper import StorageSweeper
+from app.utils.detection_store import DetectionStore
+from app.utils.species import get_species_kb
+from app.utils.response_format import parse_response_options, shape_results
+from app.utils.compression import compress_response
+from app.utils.video_stream import process_stream
+from app.utils.tracker import IoUTracker
+from app.utils.annotation import PendingAnnotations, annotation_extension, IMAGE_ID_PATTERN
+from app.utils.mock_detector import MockYOLO
+
+class UploadRequest(Request):
+    """Request whose upload size limit is raised for video uploads."""
+    
+    @property
+    def max_content_length(self):
+        if self.endpoint == 'upload_video':
+            return current_app.config['VIDEO_MAX_CONTENT_LENGTH']
+        return super().max_content_length
 
 app = Flask(__name__, 
             static_folder='app/static',
             template_folder='app/templates')
+app.request_class = UploadRequest
 
 app.config['UPLOAD_FOLDER'] = 'app/static/uploads'
+app.config['REPORTS_FOLDER'] = 'app/static/reports'
+app.config['REPORT_DATA_FOLDER'] = 'app/reports'  # Saved analyses that reports are rendered from
+app.config['REPORT_RENDER_CACHE_SIZE'] = 64  # Rendered reports kept in memory
+app.config['REPORT_CACHE_MAX_AGE'] = 3600  # Seconds browsers and proxies may reuse a report
 app.config['ALLOWED_EXTENSIONS'] = {'png', 'jpg', 'jpeg', 'pdf', 'doc', 'docx'}
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max upload
+app.config['DETECTION_BATCH_SIZE'] = 8  # Images per model call for batch uploads
+app.config['JOB_WORKERS'] = 2  # Background threads running detection jobs
+app.config['JOB_QUEUE_LIMIT'] = 32  # Queued plus running jobs before rejecting
+app.config['RESULT_CACHE_SIZE'] = 256  # In-memory results for repeated uploads
+app.config['RESULT_CACHE_DIR'] = None  # Set to a directory to persist cached results
+app.config['RETAIN_UPLOADS'] = False  # Keep a copy of uploaded images on disk
+app.config['DETECTION_MODEL'] = os.environ.get('DETECTION_MODEL', 'yolo')  # yolo, or mock for random boxes without model weights
+app.config['MOCK_SEED'] = int(os.environ['MOCK_SEED']) if os.environ.get('MOCK_SEED') else None  # Same upload, same mock boxes (None = random)
+app.config['MOCK_LATENCY'] = os.environ.get('MOCK_LATENCY', 'default')  # Simulated inference time of the mock model, see parse_latency
+app.config['INFERENCE_BACKEND'] = os.environ.get('INFERENCE_BACKEND', 'torch')  # torch, onnx or openvino
+app.config['INFERENCE_THREADS'] = int(os.environ.get('INFERENCE_THREADS', 0)) or None  # CPU threads for inference
+app.config['COVERAGE_METHOD'] = 'full'  # Green coverage estimator: full, stride or downscale
+app.config['DOCUMENT_WORKERS'] = None  # Document analysis processes (None = one per CPU)
+app.config['DOCUMENT_PAGES_PER_CHUNK'] = 20  # Fewest PDF pages analyzed per worker task
+app.config['STORAGE_MAX_AGE_HOURS'] = 24 * 7  # Remove generated reports, images and retained uploads after this long (None = no age limit)
+app.config['STORAGE_MAX_MB'] = 1024  # Combined size limit for generated reports, images and retained uploads
+app.config['STORAGE_SWEEP_INTERVAL'] = 600  # Seconds between storage sweeps
+app.config['DETECTION_STORE_DIR'] = 'app/exports'  # Columnar store of all detections and document analyses
+app.config['DETECTION_STORE_FLUSH_ROWS'] = 500  # Rows buffered before a Parquet part is written
+app.config['DETECTION_STORE_COMPACT_PARTS'] = 32  # Parquet parts merged into one by compaction (None = never)
+app.config['COMPRESSION_MIN_SIZE'] = 500  # Smallest response body compressed with brotli/gzip
+app.config['COMPRESSION_LEVEL'] = 6  # gzip 1-9, brotli 0-11
+app.config['VIDEO_EXTENSIONS'] = {'mp4', 'avi', 'mov', 'mkv', 'webm'}
+app.config['VIDEO_MAX_CONTENT_LENGTH'] = 2 * 1024 * 1024 * 1024  # 2GB max video upload
+app.config['VIDEO_CHANGE_THRESHOLD'] = 4.0  # Mean gray-level change before a video frame is detected again
+app.config['VIDEO_MAX_GAP'] = 30  # Most video frames skipped in a row on a static scene
+app.config['VIDEO_FRAME_QUEUE'] = 64  # Decoded frames buffered ahead of detection
+app.config['STREAM_SOURCES'] = {}  # Stream name -> camera index or stream URL served at /streams/<name>
+app.config['TRACKER_IOU_THRESHOLD'] = 0.3  # Least overlap for a box to continue a plant's track
+app.config['TRACKER_HIGH_CONFIDENCE'] = 0.5  # Detections below this only extend existing tracks
+app.config['TRACKER_MAX_AGE'] = 30  # Processed frames a track survives without a match
+app.config['TRACKER_MIN_HITS'] = 1  # Frames a plant must be seen in to be counted
+app.config['ANNOTATION_MODE'] = 'off'  # Annotated images: 'eager' with the upload, 'lazy' on first GET, or 'off'
+app.config['ANNOTATION_FORMAT'] = 'webp'  # webp or jpeg
+app.config['ANNOTATION_QUALITY'] = 80  # Encoder quality of annotated images, 1-100
+app.config['ANNOTATION_MAX_DIMENSION'] = 1280  # Longest side of annotated images (None = full resolution)
+app.config['ANNOTATION_PENDING_SIZE'] = 64  # Uploads kept in memory awaiting lazy rendering
+app.config['ANNOTATION_PENDING_MB'] = 128  # Memory limit for uploads awaiting lazy rendering
 app.secret_key = 'weed_detection_app_secret_key'
 
 # Create upload folder if it doesn't exist
 os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
-os.makedirs('app/static/reports', exist_ok=True)
+os.makedirs(app.config['REPORTS_FOLDER'], exist_ok=True)
+
+# Document analysis runs in worker processes, started before any
+# background threads so forked workers don't inherit them
+document_pool = DocumentAnalysisPool(max_workers=app.config['DOCUMENT_WORKERS'],
+                                     pages_per_chunk=app.config['DOCUMENT_PAGES_PER_CHUNK'])
+document_pool.start()
+
+# The mock model stands in for YOLOv8 when load testing or developing
+# without the weights
+if app.config['DETECTION_MODEL'] == 'mock':
+    detection_model = MockYOLO(seed=app.config['MOCK_SEED'], latency=app.config['MOCK_LATENCY'])
+elif app.config['DETECTION_MODEL'] == 'yolo':
+    detection_model = None
+else:
+    raise ValueError(f"Unknown DETECTION_MODEL: {app.config['DETECTION_MODEL']}. Use yolo or mock.")
+
+# Initialize the weed detector; the model loads and warms up in the
+# background so the app can serve requests (and /healthz) right away
+detector = WeedDetector(batch_size=app.config['DETECTION_BATCH_SIZE'],
+                        background_load=True,
+                        backend=app.config['INFERENCE_BACKEND'],
+                        num_threads=app.config['INFERENCE_THREADS'],
+                        coverage_method=app.config['COVERAGE_METHOD'],
+                        annotation_format=app.config['ANNOTATION_FORMAT'],
+                        annotation_quality=app.config['ANNOTATION_QUALITY'],
+                        annotation_max_dimension=app.config['ANNOTATION_MAX_DIMENSION'],
+                        model=detection_model)
+
+# Background queue for submit-then-poll detection jobs
+job_queue = JobQueue(max_workers=app.config['JOB_WORKERS'],
+                     max_pending=app.config['JOB_QUEUE_LIMIT'])
+
+# Results of previous uploads, keyed by image content
+result_cache = ResultCache(max_entries=app.config['RESULT_CACHE_SIZE'],
+                           cache_dir=app.config['RESULT_CACHE_DIR'])
 
-# Initialize the weed detector
-detector = WeedDetector()
+# Keep saved report data, annotated images and retained uploads within the
+# retention limits; the patterns leave the demo files shipped in app/static alone
+storage_sweeper = StorageSweeper({app.config['REPORT_DATA_FOLDER']: None,
+                                  app.config['UPLOAD_FOLDER']: ['*_annotated.*', 'upload_*']},
+                                 max_age=app.config['STORAGE_MAX_AGE_HOURS'] * 3600 if app.config['STORAGE_MAX_AGE_HOURS'] else None,
+                                 max_bytes=app.config['STORAGE_MAX_MB'] * 1024 * 1024,
+                                 interval=app.config['STORAGE_SWEEP_INTERVAL'])
+storage_sweeper.start()
+
+# Document analyses, rendered to HTML when a report is first viewed
+report_store = ReportStore(app.config['REPORT_DATA_FOLDER'],
+                           render=lambda analysis, report_id, created_at:
+                               render_report(analysis, report_id[:16].upper(), created_at),
+                           max_rendered=app.config['REPORT_RENDER_CACHE_SIZE'])
+
+# Uploads whose annotated image is rendered when first requested; kept in
+# memory, so the sweeper can't remove one while its URL is still handed out
+pending_annotations = PendingAnnotations(max_entries=app.config['ANNOTATION_PENDING_SIZE'],
+                                         max_bytes=app.config['ANNOTATION_PENDING_MB'] * 1024 * 1024)
+
+# Every detection and document analysis, for bulk export
+detection_store = DetectionStore(app.config['DETECTION_STORE_DIR'],
+                                 flush_rows=app.config['DETECTION_STORE_FLUSH_ROWS'],
+                                 compact_parts=app.config['DETECTION_STORE_COMPACT_PARTS'])
+
+# Detector methods that can run as background jobs
+JOB_TASKS = {
+    'detect': detector.detect,
+    'growth_stage': detector.detect_growth_stage
+}
 
 def allowed_file(filename):
     return '.' in filename and \
            filename.rsplit('.', 1)[1].lower() in app.config['ALLOWED_EXTENSIONS']
 
+def retain_upload(data, filename):
+    """
+    Write the original upload to disk if RETAIN_UPLOADS is enabled.
+    
+    Uploads are named by their content, so identical uploads share a file and
+    uploads with the same name never overwrite each other. The storage
+    sweeper keeps them within the retention limits.
+    
+    Returns:
+        str: URL of the stored upload, or None if uploads aren't retained.
+    """
+    if not app.config['RETAIN_UPLOADS']:
+        return None
+    
+    stored_name = f"upload_{hashlib.sha256(data).hexdigest()[:32]}{os.path.splitext(filename)[1].lower()}"
+    path = os.path.join(app.config['UPLOAD_FOLDER'], stored_name)
+    if os.path.exists(path):
+        # Refresh it so the sweeper keeps uploads that are still coming in
+        os.utime(path)
+    else:
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    return url_for('static', filename=f'uploads/{stored_name}')
+
+def result_cache_key(task, data):
+    return ResultCache.make_key(data, detector.model_version,
+                                detector.confidence_threshold, task)
+
+def record_detections(image_id, results):
+    """Append the detections in a detection or growth stage result to the detection store."""
+    if 'error' in results:
+        return
+    
+    # Growth stage results nest the detection results under 'detections'
+    detections = results.get('detections', [])
+    if isinstance(detections, dict):
+        detections = detections.get('detections', [])
+    detection_store.append_detections(image_id, detections, stage=results.get('growth_stage'))
+
+def run_detection_job(task, frame, image_id, data, annotate, annotated_url):
+    results = JOB_TASKS[task](frame, annotate=False)
+    record_detections(image_id, results)
+    return annotate_results(results, image_id, annotate, data, frame, annotated_url)
+
+def annotation_mode():
+    """Return the request's annotation mode; ?annotate=1 renders now, ?annotate=lazy on first GET and ?annotate=0 skips it."""
+    value = request.args.get('annotate', '').lower()
+    if value == 'lazy':
+        return 'lazy'
+    if value in ('1', 'true', 'yes'):
+        return 'eager'
+    if value in ('0', 'false', 'no'):
+        return 'off'
+    return app.config['ANNOTATION_MODE']
+
+def annotated_filename(image_id):
+    return f"{image_id}_annotated{annotation_extension(app.config['ANNOTATION_FORMAT'])}"
+
+def annotate_results(results, image_id, mode, data, frame=None, annotated_url=None):
+    """
+    Add the annotated image, or the link that renders it, to detection results.
+    
+    Annotated images are named by image content, so an image is rendered at
+    most once however often it is uploaded.
+    
+    Args:
+        results (dict): Detection or growth stage results.
+        image_id (str): Content hash of the upload.
+        mode (str): 'eager' renders the image now and adds 'annotated_image';
+            'lazy' keeps the upload and adds 'annotated_url', which renders
+            it on the first GET; 'off' adds nothing.
+        data (bytes): The uploaded image file.
+        frame (ImageFrame): The decoded upload, if already at hand.
+        annotated_url (str): URL of the lazy rendering; defaults to the
+            current app's /annotated route.
+    
+    Returns:
+        dict: The results with the annotation added. The input is not modified.
+    """
+    if mode == 'off' or 'error' in results:
+        return results
+    
+    # Growth stage results nest the detection results under 'detections'
+    nested = isinstance(results.get('detections'), dict)
+    detection_results = results['detections'] if nested else results
+    if not isinstance(detection_results.get('detections'), list):
+        return results
+    
+    filename = annotated_filename(image_id)
+    rendered = os.path.exists(os.path.join(app.config['UPLOAD_FOLDER'], filename))
+    
+    if mode == 'eager':
+        if not rendered:
+            frame = frame or ImageFrame.from_bytes(data)
+            detector.save_annotated_image(frame, detection_results['detections'],
+                                          os.path.join(app.config['UPLOAD_FOLDER'], filename))
+        annotation = {'annotated_image': filename}
+    else:
+        if not rendered:
+            pending_annotations.save(image_id, data, detection_results['detections'])
+        annotation = {'annotated_url': annotated_url or url_for('annotated_image', image_id=image_id)}
+    
+    detection_results = {**detection_results, **annotation}
+    return {**results, 'detections': detection_results} if nested else detection_results
+
+def parse_time_arg(name):
+    """Parse an ISO 8601 query parameter, treating times without a zone as UTC."""
+    value = request.args.get(name)
+    if not value:
+        return None
+    
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
+
+def stream_detections(source, source_id, max_frames=None, cleanup=None, tracker=None):
+    """
+    Stream detection results for a video source as newline-delimited JSON.
+    
+    Args:
+        source (str or int): Video file path, stream URL or camera index.
+        source_id (str): Prefix of the image ids recorded in the detection store.
+        max_frames (int): Stop after this many frames.
+        cleanup (callable): Called once the stream ends, e.g. to remove a
+            temporary file.
+        tracker (IoUTracker): Follow plants across frames.
+    
+    Returns:
+        flask.Response: The streamed results, ending with a summary line.
+    
+    Raises:
+        ValueError: If the source can't be opened.
+    """
+    verbose, fields = parse_response_options(request.args)
+    items = process_stream(detector, source,
+                           change_threshold=app.config['VIDEO_CHANGE_THRESHOLD'],
+                           max_gap=app.config['VIDEO_MAX_GAP'],
+                           max_queue=app.config['VIDEO_FRAME_QUEUE'],
+                           max_frames=max_frames,
+                           tracker=tracker)
+    
+    def generate():
+        try:
+            for item in items:
+                if 'summary' not in item:
+                    record_detections(f"{source_id}#{item['frame']}", item)
+                    item = shape_results(item, verbose, fields)
+                yield json.dumps(item, separators=(',', ':')) + '\n'
+        except Exception as e:
+            print(f"Error during video detection: {e}")
+            yield json.dumps({'error': str(e)}) + '\n'
+        finally:
+            # Stop the decoder before cleaning up its source
+            items.close()
+            if cleanup is not None:
+                cleanup()
+    
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+def request_tracker():
+    """Return a new IoUTracker if the request asks for ?track=1, else None."""
+    if request.args.get('track', '').lower() not in ('1', 'true', 'yes'):
+        return None
+    return IoUTracker(iou_threshold=app.config['TRACKER_IOU_THRESHOLD'],
+                      high_confidence=app.config['TRACKER_HIGH_CONFIDENCE'],
+                      max_age=app.config['TRACKER_MAX_AGE'],
+                      min_hits=app.config['TRACKER_MIN_HITS'])
+
+def shaped(results):
+    """Apply the request's ?verbose= and ?fields= options to detection results."""
+    verbose, fields = parse_response_options(request.args)
+    return shape_results(results, verbose, fields)
+
+@app.after_request
+def compress(response):
+    return compress_response(response, request.headers.get('Accept-Encoding', ''),
+                             min_size=app.config['COMPRESSION_MIN_SIZE'],
+                             level=app.config['COMPRESSION_LEVEL'])
+
 @app.route('/')
 def index():
     return render_template('index.html')
@@ -33,6 +348,24 @@ def index():
 def about():
     return render_template('about.html')
 
+@app.route('/healthz')
+def healthz():
+    return jsonify({'status': 'ok'})
+
+@app.route('/readyz')
+def readyz():
+    status = detector.load_status()
+    return jsonify(status), 200 if status['status'] == 'ready' else 503
+
+@app.route('/species', methods=['GET'])
+def species_list():
+    # Lets clients resolve the remedy ids in detection results once
+    species = get_species_kb()
+    return jsonify({
+        'species': species.species,
+        'remedies': species.remedies
+    })
+
 @app.route('/upload_image', methods=['POST'])
 def upload_image():
     if 'file' not in request.files:
@@ -45,20 +378,102 @@ def upload_image():
     
     if file and allowed_file(file.filename):
         filename = secure_filename(file.filename)
-        filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-        file.save(filepath)
+        data = file.read()
+        
+        image_id = hashlib.sha256(data).hexdigest()
+        annotate = annotation_mode()
+        
+        # Reuse the result of an identical earlier upload
+        cache_key = result_cache_key('detect', data)
+        results = result_cache.get(cache_key)
+        if results is not None:
+            return jsonify({
+                'success': True,
+                'filename': filename,
+                'upload_url': retain_upload(data, filename),
+                'results': shaped(annotate_results(results, image_id, annotate, data)),
+                'cached': True
+            })
+        
+        # Decode straight from the upload stream
+        try:
+            frame = ImageFrame.from_bytes(data, name=filename)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        upload_url = retain_upload(data, filename)
         
         # Process the image with YOLOv8
-        results = detector.detect(filepath)
+        results = detector.detect(frame, annotate=False)
+        
+        if 'error' not in results:
+            result_cache.set(cache_key, results)
+            record_detections(image_id, results)
         
         return jsonify({
             'success': True,
             'filename': filename,
-            'results': results
+            'upload_url': upload_url,
+            'results': shaped(annotate_results(results, image_id, annotate, data, frame)),
+            'cached': False
         })
     
     return jsonify({'error': 'File type not allowed'}), 400
 
+@app.route('/upload_images', methods=['POST'])
+def upload_images():
+    files = request.files.getlist('files')
+    
+    if not files:
+        return jsonify({'error': 'No file part'}), 400
+    
+    # Keep one slot per upload so results line up with the uploaded files
+    items = []
+    frames = []
+    uploads = []
+    for file in files:
+        if file.filename == '':
+            items.append({'error': 'No selected file'})
+            continue
+        
+        if not allowed_file(file.filename):
+            items.append({'filename': file.filename, 'error': 'File type not allowed'})
+            continue
+        
+        filename = secure_filename(file.filename)
+        data = file.read()
+        
+        # Decode straight from the upload stream
+        try:
+            frame = ImageFrame.from_bytes(data, name=filename)
+        except ValueError as e:
+            items.append({'filename': filename, 'error': str(e)})
+            continue
+        
+        items.append({'filename': filename, 'upload_url': retain_upload(data, filename)})
+        frames.append(frame)
+        uploads.append((hashlib.sha256(data).hexdigest(), data))
+    
+    # With ?track=1 the uploads are frames of one sequence, in upload order
+    tracker = request_tracker()
+    
+    # Process all accepted images with batched YOLOv8 inference
+    annotate = annotation_mode()
+    results = iter(zip(uploads, frames, detector.detect_batch(frames, annotate=False, tracker=tracker)))
+    for item in items:
+        if 'error' not in item:
+            (image_id, data), frame, item['results'] = next(results)
+            record_detections(image_id, item['results'])
+            item['results'] = shaped(annotate_results(item['results'], image_id, annotate, data, frame))
+    
+    response = {
+        'success': True,
+        'results': items
+    }
+    if tracker is not None:
+        response['plant_counts'] = tracker.counts()
+        response['plants'] = sum(response['plant_counts'].values())
+    return jsonify(response)
+
 @app.route('/upload_document', methods=['POST'])
 def upload_document():
     if 'document' not in request.files:
@@ -71,14 +486,26 @@ def upload_document():
     
     if file and allowed_file(file.filename):
         filename = secure_filename(file.filename)
-        filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-        file.save(filepath)
         
-        # Analyze the document
-        analysis_results = analyze_document(filepath)
+        # The workers read the document from a temporary file of its own, so
+        # uploads with the same name don't overwrite each other and nothing
+        # is left behind in the uploads folder
+        fd, filepath = tempfile.mkstemp(suffix=os.path.splitext(filename)[1].lower())
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                file.save(f)
+            
+            # Analyze the document in the worker pool
+            analysis_results = document_pool.analyze(filepath)
+        finally:
+            os.remove(filepath)
         
-        # Generate a report
-        report_path = generate_report(analysis_results)
+        # Save the analysis; the report is rendered when it is first viewed
+        report_path = None
+        if analysis_results.get('status') == 'success':
+            report_id = report_store.save(analysis_results['analysis'])
+            report_path = url_for('view_report', report_id=report_id)
+            detection_store.append_document(report_id, analysis_results['analysis'], filename=filename)
         
         return jsonify({
             'success': True,
@@ -89,6 +516,93 @@ def upload_document():
     
     return jsonify({'error': 'File type not allowed'}), 400
 
+@app.route('/upload_video', methods=['POST'])
+def upload_video():
+    if 'file' not in request.files:
+        return jsonify({'error': 'No file part'}), 400
+    
+    file = request.files['file']
+    
+    if file.filename == '':
+        return jsonify({'error': 'No selected file'}), 400
+    
+    extension = file.filename.rsplit('.', 1)[-1].lower() if '.' in file.filename else ''
+    if extension not in app.config['VIDEO_EXTENSIONS']:
+        return jsonify({'error': 'File type not allowed'}), 400
+    
+    # OpenCV decodes from a path, so the upload is copied to a temporary
+    # file in chunks, hashing it on the way rather than reading it into memory
+    digest = hashlib.sha256()
+    fd, path = tempfile.mkstemp(suffix=f'.{extension}')
+    with os.fdopen(fd, 'wb') as f:
+        for chunk in iter(lambda: file.stream.read(1024 * 1024), b''):
+            digest.update(chunk)
+            f.write(chunk)
+    
+    try:
+        max_frames = request.args.get('max_frames', type=int)
+        return stream_detections(path, digest.hexdigest(), max_frames,
+                                 cleanup=lambda: os.remove(path), tracker=request_tracker())
+    except ValueError as e:
+        os.remove(path)
+        return jsonify({'error': str(e)}), 400
+
+@app.route('/streams/<name>', methods=['GET'])
+def stream(name):
+    # Only configured sources can be opened, never a URL from the request
+    if name not in app.config['STREAM_SOURCES']:
+        return jsonify({'error': 'Unknown stream'}), 404
+    
+    try:
+        return stream_detections(app.config['STREAM_SOURCES'][name], name,
+                                 request.args.get('max_frames', type=int),
+                                 tracker=request_tracker())
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+@app.route('/reports/<report_id>', methods=['GET'])
+def view_report(report_id):
+    rendered = report_store.render(report_id)
+    
+    if rendered is None:
+        return jsonify({'error': 'Report not found'}), 404
+    
+    html, created_at = rendered
+    response = make_response(html)
+    
+    # Reports never change once saved, so repeat views can be answered with 304;
+    # the save time is part of the tag because it is shown in the report
+    response.set_etag(f"{report_id}-{int(created_at.timestamp())}")
+    response.last_modified = created_at
+    response.cache_control.public = True
+    response.cache_control.max_age = app.config['REPORT_CACHE_MAX_AGE']
+    return response.make_conditional(request)
+
+@app.route('/annotated/<image_id>', methods=['GET'])
+def annotated_image(image_id):
+    if not IMAGE_ID_PATTERN.fullmatch(image_id):
+        return jsonify({'error': 'Annotated image not found'}), 404
+    
+    # Render on the first request, then serve the saved file
+    filename = annotated_filename(image_id)
+    path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
+    if not os.path.exists(path):
+        pending = pending_annotations.load(image_id)
+        if pending is not None:
+            data, detections = pending
+            try:
+                detector.save_annotated_image(ImageFrame.from_bytes(data), detections, path)
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 500
+            pending_annotations.discard(image_id)
+        elif not os.path.exists(path):
+            # Not pending, and not just rendered by a concurrent request
+            return jsonify({'error': 'Annotated image not found'}), 404
+    
+    # The image never changes for a given upload
+    return send_from_directory(app.config['UPLOAD_FOLDER'], filename,
+                               max_age=app.config['REPORT_CACHE_MAX_AGE'])
+
 @app.route('/detect_growth_stage', methods=['POST'])
 def detect_growth_stage():
     if 'file' not in request.files:
@@ -101,19 +615,126 @@ def detect_growth_stage():
     
     if file and allowed_file(file.filename):
         filename = secure_filename(file.filename)
-        filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-        file.save(filepath)
+        data = file.read()
+        
+        # ?stage_only=1 skips detection and annotation
+        stage_only = request.args.get('stage_only', '').lower() in ('1', 'true', 'yes')
+        image_id = hashlib.sha256(data).hexdigest()
+        annotate = annotation_mode()
+        
+        # Reuse the result of an identical earlier upload
+        cache_key = result_cache_key('growth_stage_only' if stage_only else 'growth_stage', data)
+        growth_stage = result_cache.get(cache_key)
+        if growth_stage is not None:
+            return jsonify({
+                'success': True,
+                'filename': filename,
+                'upload_url': retain_upload(data, filename),
+                'growth_stage': shaped(annotate_results(growth_stage, image_id, annotate, data)),
+                'cached': True
+            })
+        
+        # Decode straight from the upload stream
+        try:
+            frame = ImageFrame.from_bytes(data, name=filename)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        upload_url = retain_upload(data, filename)
         
         # Detect the growth stage
-        growth_stage = detector.detect_growth_stage(filepath)
+        growth_stage = detector.detect_growth_stage(frame, run_detection=not stage_only, annotate=False)
+        
+        if 'error' not in growth_stage:
+            result_cache.set(cache_key, growth_stage)
+            record_detections(image_id, growth_stage)
         
         return jsonify({
             'success': True,
             'filename': filename,
-            'growth_stage': growth_stage
+            'upload_url': upload_url,
+            'growth_stage': shaped(annotate_results(growth_stage, image_id, annotate, data, frame)),
+            'cached': False
         })
     
     return jsonify({'error': 'File type not allowed'}), 400
 
+@app.route('/jobs', methods=['POST'])
+def submit_job():
+    if 'file' not in request.files:
+        return jsonify({'error': 'No file part'}), 400
+    
+    file = request.files['file']
+    task = request.form.get('task', 'detect')
+    
+    if task not in JOB_TASKS:
+        return jsonify({'error': f'Unknown task: {task}'}), 400
+    
+    if file.filename == '':
+        return jsonify({'error': 'No selected file'}), 400
+    
+    if file and allowed_file(file.filename):
+        filename = secure_filename(file.filename)
+        data = file.read()
+        
+        # Decode straight from the upload stream
+        try:
+            frame = ImageFrame.from_bytes(data, name=filename)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        upload_url = retain_upload(data, filename)
+        
+        # Run inference in the background and return immediately
+        try:
+            image_id = hashlib.sha256(data).hexdigest()
+            job_id = job_queue.submit(run_detection_job, task, frame, image_id, data, annotation_mode(),
+                                      url_for('annotated_image', image_id=image_id))
+        except QueueFullError as e:
+            response = jsonify({'error': str(e)})
+            response.headers['Retry-After'] = '5'
+            return response, 429
+        
+        return jsonify({
+            'success': True,
+            'job_id': job_id,
+            'task': task,
+            'filename': filename,
+            'upload_url': upload_url,
+            'status_url': url_for('job_status', job_id=job_id)
+        }), 202
+    
+    return jsonify({'error': 'File type not allowed'}), 400
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def job_status(job_id):
+    job = job_queue.get(job_id)
+    
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    
+    if 'result' in job:
+        job['result'] = shaped(job['result'])
+    
+    return jsonify(job)
+
+@app.route('/export/<table>', methods=['GET'])
+def export_table(table):
+    if table not in ('detections', 'documents'):
+        return jsonify({'error': f'Unknown table: {table}'}), 404
+    
+    export_format = request.args.get('format', 'csv').lower()
+    
+    try:
+        since = parse_time_arg('since')
+        until = parse_time_arg('until')
+        chunks = detection_store.export(export_format, table, since, until)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    # Stream the export so large stores never sit in memory as one response
+    mimetype = 'text/csv' if export_format == 'csv' else 'application/geo+json'
+    return Response(stream_with_context(chunks), mimetype=mimetype, headers={
+        'Content-Disposition': f'attachment; filename={table}.{export_format}'
+    })
+
 if __name__ == '__main__':
     app.run(debug=True) 
\ No newline at end of file
@@ -46,7 +46,7 @@ document.addEventListener('DOMContentLoaded', function() {
             document.getElementById('resultsCard').classList.remove('d-none');
             
             // Send the image for weed detection
-            fetch('/upload_image', {
+            fetch('/upload_image?annotate=lazy', {
                 method: 'POST',
                 body: formData
             })
@@ -115,7 +115,7 @@ document.addEventListener('DOMContentLoaded', function() {
             showLoading('stageDetails');
             
             // Send the image for growth stage detection
-            fetch('/detect_growth_stage', {
+            fetch('/detect_growth_stage?annotate=lazy', {
                 method: 'POST',
                 body: formData
             })
@@ -196,7 +196,8 @@ document.addEventListener('DOMContentLoaded', function() {
 function displayDetectionResults(data) {
     // Update the result image
     const resultImage = document.getElementById('resultImage');
-    resultImage.src = `/static/uploads/${data.annotated_image}`;
+    // Lazily annotated images are rendered when this URL is first loaded
+    resultImage.src = data.annotated_url || `/static/uploads/${data.annotated_image}`;
     
     // Display the detection results
     const detectionsList = document.getElementById('detectionsList');
@@ -209,6 +210,9 @@ function displayDetectionResults(data) {
             
             const confidencePercent = Math.round(detection.confidence * 100);
             
+            // Remedies are sent once by id rather than with every detection
+            const remedy = (data.remedies || {})[detection.remedy_id] || detection.remedy || {};
+            
             weedItem.innerHTML = `
                 <h5 class="text-success">${detection.weed_type}</h5>
                 <div class="d-flex align-items-center mb-2">
@@ -234,13 +238,13 @@ function displayDetectionResults(data) {
                     </div>
                     <div class="tab-content remedy-content">
                         <div class="tab-pane fade show active" id="organic-${detection.id}" role="tabpanel">
-                            <p>${detection.remedy.organic}</p>
+                            <p>${remedy.organic}</p>
                         </div>
                         <div class="tab-pane fade" id="chemical-${detection.id}" role="tabpanel">
-                            <p>${detection.remedy.chemical}</p>
+                            <p>${remedy.chemical}</p>
                         </div>
                         <div class="tab-pane fade" id="prevention-${detection.id}" role="tabpanel">
-                            <p>${detection.remedy.prevention}</p>
+                            <p>${remedy.prevention}</p>
                         </div>
                     </div>
                 </div>
@@ -265,11 +269,13 @@ function displayDetectionResults(data) {
 function displayGrowthStageResults(data) {
     // Update the growth stage image
     const growthResultImage = document.getElementById('growthResultImage');
-    if (data.detections && data.detections.annotated_image) {
+    if (data.detections && data.detections.annotated_url) {
+        growthResultImage.src = data.detections.annotated_url;
+    } else if (data.detections && data.detections.annotated_image) {
         growthResultImage.src = `/static/uploads/${data.detections.annotated_image}`;
     } else {
         // If no annotated image, use the original image
-        growthResultImage.src = `/static/uploads/${data.filename}`;
+        growthResultImage.src = data.upload_url || `/static/uploads/${data.filename}`;
     }
     
     // Update the growth stage information
@@ -168,7 +168,7 @@ document.addEventListener('DOMContentLoaded', function() {
                 .then(data => {
                     if (data.success) {
                         // Display the results
-                        annotatedImage.src = `/static/uploads/${data.filename}`;
+                        annotatedImage.src = data.upload_url || `/static/uploads/${data.filename}`;
                         document.getElementById('modelVersion').textContent = data.results.model || 'YOLOv12';
                         document.getElementById('inferenceTime').textContent = data.results.inference_time || '0.0s';
                         document.getElementById('confidenceThreshold').textContent = data.results.confidence_threshold || '0.0';
@@ -323,7 +323,7 @@ document.addEventListener('DOMContentLoaded', function() {
                 .then(data => {
                     if (data.success) {
                         // Display the results
-                        growthImage.src = `/static/uploads/${data.filename}`;
+                        growthImage.src = data.upload_url || `/static/uploads/${data.filename}`;
                         
                         let infoHtml = `
                             <div class="text-center mb-4">
@@ -0,0 +1,160 @@
+import re
+import threading
+from collections import OrderedDict
+import cv2
+
+# Uploads are identified by the sha256 of their content
+IMAGE_ID_PATTERN = re.compile(r'[0-9a-f]{64}')
+
+# Encodings for annotated images: format -> (file extension, OpenCV quality flag)
+ANNOTATION_FORMATS = {
+    'webp': ('.webp', cv2.IMWRITE_WEBP_QUALITY),
+    'jpeg': ('.jpg', cv2.IMWRITE_JPEG_QUALITY)
+}
+
+def annotation_extension(format):
+    """
+    Return the file extension for an annotation format.
+
+    Raises:
+        ValueError: If the format is not in ANNOTATION_FORMATS.
+    """
+    if format not in ANNOTATION_FORMATS:
+        raise ValueError(f"Unknown annotation format: {format}. Choose from {', '.join(ANNOTATION_FORMATS)}.")
+    return ANNOTATION_FORMATS[format][0]
+
+def draw_detections(image, detections, max_dimension=None):
+    """
+    Draw detection boxes and labels on a copy of a BGR image.
+
+    The image is downscaled first when it is larger than max_dimension, so
+    drawing and encoding only touch the pixels that are kept. Drawing works
+    on the BGR buffer directly; there is no conversion to RGB.
+
+    Args:
+        image (numpy.ndarray): BGR image. It is not modified.
+        detections (list): Detection dicts with bbox, weed_type and confidence.
+        max_dimension (int): Longest side of the output in pixels; None keeps
+            the full resolution.
+
+    Returns:
+        numpy.ndarray: The annotated BGR image.
+    """
+    height, width = image.shape[:2]
+    scale = 1.0
+    if max_dimension and max(height, width) > max_dimension:
+        scale = max_dimension / max(height, width)
+        canvas = cv2.resize(image, (max(1, round(width * scale)), max(1, round(height * scale))),
+                            interpolation=cv2.INTER_AREA)
+    else:
+        canvas = image.copy()
+
+    # Line and text size follow the output size so labels stay readable
+    thickness = max(1, round(max(canvas.shape[:2]) / 400))
+    font_scale = thickness * 0.4
+
+    for detection in detections:
+        x1, y1, x2, y2 = (round(value * scale) for value in detection['bbox'])
+        color = _color(detection['weed_type'])
+        cv2.rectangle(canvas, (x1, y1), (x2, y2), color, thickness)
+
+        label = f"{detection['weed_type']} {detection['confidence']:.2f}"
+        (text_width, text_height), baseline = cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX,
+                                                              font_scale, thickness)
+        top = max(y1 - text_height - baseline, 0)
+        cv2.rectangle(canvas, (x1, top), (x1 + text_width, top + text_height + baseline), color, -1)
+        cv2.putText(canvas, label, (x1, top + text_height), cv2.FONT_HERSHEY_SIMPLEX,
+                    font_scale, (255, 255, 255), thickness, cv2.LINE_AA)
+
+    return canvas
+
+def encode_image(image, format='webp', quality=80):
+    """
+    Encode a BGR image as WebP or JPEG.
+
+    Args:
+        image (numpy.ndarray): BGR image.
+        format (str): One of ANNOTATION_FORMATS.
+        quality (int): Encoder quality, 1-100.
+
+    Returns:
+        bytes: The encoded image.
+
+    Raises:
+        ValueError: If the format is unknown or encoding fails.
+    """
+    extension = annotation_extension(format)
+    ok, buffer = cv2.imencode(extension, image, [ANNOTATION_FORMATS[format][1], int(quality)])
+    if not ok:
+        raise ValueError(f"Could not encode image as {format}")
+    return buffer.tobytes()
+
+def _color(weed_type):
+    # A stable color per weed type, in BGR
+    value = sum(ord(char) * (index + 1) for index, char in enumerate(weed_type or ''))
+    return (value * 67 % 200 + 55, value * 131 % 200 + 55, value * 29 % 200 + 55)
+
+class PendingAnnotations:
+    """
+    Uploads waiting for their annotated image to be rendered.
+
+    Keeps the original upload bytes, exactly as received, and its
+    detections in a bounded in-memory LRU, so the annotated image can be
+    rendered when it is first requested rather than for every upload.
+    Nothing is written to disk until then. When the limits are reached the
+    least recently used uploads are dropped, and their annotated_url
+    returns 404.
+    """
+
+    def __init__(self, max_entries=64, max_bytes=128 * 1024 * 1024):
+        """
+        Args:
+            max_entries (int): Most uploads kept.
+            max_bytes (int): Most upload bytes kept.
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def save(self, image_id, data, detections):
+        """
+        Keep an upload until its annotated image is requested.
+
+        Args:
+            image_id (str): Content hash of the upload.
+            data (bytes): The uploaded image file.
+            detections (list): Its detection dicts.
+        """
+        if len(data) > self.max_bytes:
+            return
+        with self._lock:
+            if image_id in self._entries:
+                self._entries.move_to_end(image_id)
+                return
+            self._entries[image_id] = (data, detections)
+            self._bytes += len(data)
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, (evicted, _) = self._entries.popitem(last=False)
+                self._bytes -= len(evicted)
+
+    def load(self, image_id):
+        """
+        Return a pending upload.
+
+        Args:
+            image_id (str): Content hash of the upload.
+
+        Returns:
+            tuple: (image bytes, detections), or None if it isn't pending.
+        """
+        with self._lock:
+            return self._entries.get(image_id)
+
+    def discard(self, image_id):
+        """Drop a pending upload once its annotated image is rendered."""
+        with self._lock:
+            entry = self._entries.pop(image_id, None)
+            if entry is not None:
+                self._bytes -= len(entry[0])
@@ -0,0 +1,62 @@
+import gzip
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Response types worth compressing
+COMPRESSIBLE_MIMETYPES = ('application/json', 'application/geo+json', 'text/html', 'text/csv',
+                          'text/plain', 'text/css', 'application/javascript')
+
+def compress_response(response, accept_encoding, min_size=500, level=6):
+    """
+    Compress a response body with brotli or gzip if the client accepts it.
+
+    Brotli is preferred when the brotli package is installed. Streamed
+    responses, small bodies and non-text types are left as they are. A
+    strong ETag becomes weak, since the compressed bytes differ from the
+    uncompressed representation; conditional requests still match it.
+
+    Args:
+        response (flask.Response): The response to compress.
+        accept_encoding (str): The request's Accept-Encoding header.
+        min_size (int): Smallest body in bytes worth compressing.
+        level (int): Compression level, 1-9 for gzip and 0-11 for brotli.
+
+    Returns:
+        flask.Response: The same response, compressed in place if suitable.
+    """
+    response.vary.add('Accept-Encoding')
+
+    if (response.status_code < 200 or response.status_code >= 300
+            or response.is_streamed or response.direct_passthrough
+            or 'Content-Encoding' in response.headers
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+        return response
+
+    encodings = {value.split(';')[0].strip().lower() for value in accept_encoding.split(',')}
+    if brotli is not None and 'br' in encodings:
+        encoding = 'br'
+    elif 'gzip' in encodings:
+        encoding = 'gzip'
+    else:
+        return response
+
+    data = response.get_data()
+    if len(data) < min_size:
+        return response
+
+    if encoding == 'br':
+        compressed = brotli.compress(data, quality=min(level, 11))
+    else:
+        compressed = gzip.compress(data, compresslevel=min(max(level, 1), 9))
+
+    response.set_data(compressed)
+    response.headers['Content-Encoding'] = encoding
+
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+
+    return response
@@ -0,0 +1,357 @@
+import atexit
+import json
+import os
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+import pandas as pd
+
+# Columns of the detections table; the box is stored as four pixel columns
+DETECTION_COLUMNS = ['image_id', 'x1', 'y1', 'x2', 'y2', 'weed_type', 'confidence', 'stage', 'timestamp']
+
+# Columns of the document analyses table, one row per counted term
+DOCUMENT_COLUMNS = ['document_id', 'filename', 'category', 'term', 'mentions', 'timestamp']
+
+# Formats the export methods can produce
+EXPORT_FORMATS = ('csv', 'geojson')
+
+class DetectionStore:
+    """
+    Append-only columnar store of detections and document analyses.
+
+    Rows are buffered in memory and written out as Parquet part files once
+    flush_rows have accumulated, when an export starts, and at exit. Each
+    flush writes a new uniquely named file, so several processes can share
+    one store directory. Without a Parquet engine (pyarrow or fastparquet)
+    the parts are written as CSV instead. If a write fails, the rows go
+    back into the buffer for the next flush.
+
+    Once compact_parts flushed parts are older than a minute, they are
+    merged into one compacted part named after the first and last part it
+    covers. Readers skip parts covered by a compacted part, so an export
+    never sees a row twice, and the merged parts are only deleted ten
+    minutes later, so exports already reading them can finish.
+    """
+
+    # Flushed parts younger than this are left for the next compaction, in
+    # case another process is still writing one
+    COMPACT_MIN_AGE = 60
+
+    # Seconds merged parts are kept after compaction for exports reading them
+    COMPACT_GRACE = 600
+
+    # Compaction lock files older than this were left by a crashed process
+    COMPACT_LOCK_TIMEOUT = 600
+
+    def __init__(self, store_dir, flush_rows=500, compact_parts=32):
+        """
+        Args:
+            store_dir (str): Directory holding the part files.
+            flush_rows (int): Buffered rows per table before writing a part.
+            compact_parts (int): Flushed parts merged per compaction; None
+                never compacts.
+        """
+        self.store_dir = store_dir
+        self.flush_rows = flush_rows
+        self.compact_parts = compact_parts
+        self._buffers = {'detections': [], 'documents': []}
+        self._lock = threading.Lock()
+        self._part_format = 'parquet' if _parquet_available() else 'csv'
+
+        if self._part_format == 'csv':
+            print("pyarrow is not installed; writing the detection store as CSV")
+
+        for table in self._buffers:
+            os.makedirs(os.path.join(store_dir, table), exist_ok=True)
+
+        atexit.register(self.flush)
+
+    def append_detections(self, image_id, detections, stage=None, timestamp=None):
+        """
+        Record the detections for one image.
+
+        Args:
+            image_id (str): Identifier of the image, such as its content hash.
+            detections (list): Detection dicts with bbox, weed_type and
+                confidence, as returned by WeedDetector.detect.
+            stage (str): Growth stage of the image, if known.
+            timestamp (datetime): When the image was analyzed; defaults to now.
+        """
+        timestamp = timestamp or _now()
+        rows = [{
+            'image_id': image_id,
+            'x1': detection['bbox'][0],
+            'y1': detection['bbox'][1],
+            'x2': detection['bbox'][2],
+            'y2': detection['bbox'][3],
+            'weed_type': detection['weed_type'],
+            'confidence': detection['confidence'],
+            'stage': stage,
+            'timestamp': timestamp
+        } for detection in detections]
+        self._append('detections', rows)
+
+    def append_document(self, document_id, analysis, filename=None, timestamp=None):
+        """
+        Record the term counts of one document analysis.
+
+        Args:
+            document_id (str): Identifier of the analysis, such as its report id.
+            analysis (dict): Analysis results from document analysis.
+            filename (str): Name of the analyzed document.
+            timestamp (datetime): When the document was analyzed; defaults to now.
+        """
+        timestamp = timestamp or _now()
+        rows = [{
+            'document_id': document_id,
+            'filename': filename,
+            'category': category,
+            'term': term,
+            'mentions': count,
+            'timestamp': timestamp
+        } for category in ('weed_mentions', 'growth_stages', 'treatments')
+            for term, count in analysis.get(category, {}).items()]
+        self._append('documents', rows)
+
+    def flush(self):
+        """Write all buffered rows to new part files."""
+        for table in self._buffers:
+            self._flush_table(table)
+
+    def iter_frames(self, table='detections', since=None, until=None):
+        """
+        Read a table one part file at a time.
+
+        Args:
+            table (str): 'detections' or 'documents'.
+            since (datetime): Only rows at or after this time.
+            until (datetime): Only rows before this time.
+
+        Yields:
+            pandas.DataFrame: Rows of one part, in the table's columns.
+        """
+        self.flush()
+        columns = DETECTION_COLUMNS if table == 'detections' else DOCUMENT_COLUMNS
+
+        for name in self._visible_parts(table):
+            path = os.path.join(self.store_dir, table, name)
+            try:
+                frame = self._read_part(path)
+            except FileNotFoundError:
+                continue
+
+            if since is not None:
+                frame = frame[frame['timestamp'] >= since]
+            if until is not None:
+                frame = frame[frame['timestamp'] < until]
+            if len(frame):
+                yield frame[columns]
+
+    def export(self, format='csv', table='detections', since=None, until=None):
+        """
+        Stream a table as CSV or GeoJSON.
+
+        GeoJSON is only available for detections. Each box becomes a
+        polygon in pixel coordinates, since uploads carry no georeference.
+
+        Args:
+            format (str): One of EXPORT_FORMATS.
+            table (str): 'detections' or 'documents'.
+            since (datetime): Only rows at or after this time.
+            until (datetime): Only rows before this time.
+
+        Yields:
+            str: Chunks of the exported file.
+        """
+        if format not in EXPORT_FORMATS:
+            raise ValueError(f"Unknown export format: {format}. Choose from {', '.join(EXPORT_FORMATS)}.")
+        if format == 'geojson' and table != 'detections':
+            raise ValueError("GeoJSON export is only available for detections.")
+
+        frames = self.iter_frames(table, since, until)
+        if format == 'csv':
+            return self._export_csv(frames, table)
+        return self._export_geojson(frames)
+
+    def _export_csv(self, frames, table):
+        columns = DETECTION_COLUMNS if table == 'detections' else DOCUMENT_COLUMNS
+        yield ','.join(columns) + '\n'
+        for frame in frames:
+            frame = frame.assign(timestamp=frame['timestamp'].map(lambda t: t.isoformat()))
+            yield frame.to_csv(index=False, header=False)
+
+    def _export_geojson(self, frames):
+        yield '{"type":"FeatureCollection","features":['
+        first = True
+        for frame in frames:
+            features = []
+            for row in frame.itertuples(index=False):
+                x1, y1, x2, y2 = int(row.x1), int(row.y1), int(row.x2), int(row.y2)
+                features.append(json.dumps({
+                    'type': 'Feature',
+                    'geometry': {
+                        'type': 'Polygon',
+                        'coordinates': [[[x1, y1], [x2, y1], [x2, y2], [x1, y2], [x1, y1]]]
+                    },
+                    'properties': {
+                        'image_id': row.image_id,
+                        'weed_type': row.weed_type,
+                        'confidence': float(row.confidence),
+                        'stage': row.stage if isinstance(row.stage, str) else None,
+                        'timestamp': row.timestamp.isoformat()
+                    }
+                }, separators=(',', ':')))
+            if features:
+                yield ('' if first else ',') + ','.join(features)
+                first = False
+        yield ']}'
+
+    def _append(self, table, rows):
+        if not rows:
+            return
+
+        with self._lock:
+            self._buffers[table].extend(rows)
+            full = len(self._buffers[table]) >= self.flush_rows
+
+        if full:
+            self._flush_table(table)
+
+    def compact(self, table):
+        """
+        Merge a table's flushed parts into one compacted part.
+
+        Only runs in one process at a time; other processes skip it while
+        the lock file in the table directory exists.
+
+        Args:
+            table (str): 'detections' or 'documents'.
+
+        Returns:
+            int: Number of parts merged.
+        """
+        directory = os.path.join(self.store_dir, table)
+        lock_path = os.path.join(directory, '.compact.lock')
+        try:
+            if time.time() - os.path.getmtime(lock_path) > self.COMPACT_LOCK_TIMEOUT:
+                os.remove(lock_path)
+        except FileNotFoundError:
+            pass
+        try:
+            os.close(os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+        except FileExistsError:
+            return 0
+
+        try:
+            names, ranges = self._list_parts(table)
+            self._remove_merged(directory, names, ranges)
+
+            cutoff = f"part-{(_now() - timedelta(seconds=self.COMPACT_MIN_AGE)).strftime('%Y%m%dT%H%M%S')}"
+            pending = [name for name in names
+                       if '~' not in name and _stem(name) < cutoff and not _covered(_stem(name), ranges)]
+            if len(pending) < (self.compact_parts or 2):
+                return 0
+
+            frame = pd.concat([self._read_part(os.path.join(directory, name)) for name in pending],
+                              ignore_index=True)
+            self._write_part(frame, table, f"{_stem(pending[0])}~{_stem(pending[-1])}")
+            return len(pending)
+        except Exception as e:
+            print(f"Error compacting {table} in the detection store: {e}")
+            return 0
+        finally:
+            try:
+                os.remove(lock_path)
+            except FileNotFoundError:
+                pass
+
+    def _flush_table(self, table):
+        with self._lock:
+            rows, self._buffers[table] = self._buffers[table], []
+        if not rows:
+            return
+
+        try:
+            name = f"part-{_now().strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:8]}"
+            self._write_part(pd.DataFrame(rows), table, name)
+        except Exception as e:
+            print(f"Error writing {table} to the detection store: {e}")
+            # Keep the rows, ahead of any appended since, for the next flush
+            with self._lock:
+                self._buffers[table][:0] = rows
+            return
+
+        if self.compact_parts:
+            self.compact(table)
+
+    def _write_part(self, frame, table, stem):
+        path = os.path.join(self.store_dir, table, f"{stem}.{self._part_format}")
+
+        # Write to a temporary file first so exports never read a partial part
+        tmp_path = f"{path}.tmp"
+        try:
+            if self._part_format == 'parquet':
+                frame.to_parquet(tmp_path, index=False)
+            else:
+                frame.to_csv(tmp_path, index=False)
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def _list_parts(self, table):
+        # Part file names in order, and the (first, last) stems each
+        # compacted part covers
+        names = sorted(name for name in os.listdir(os.path.join(self.store_dir, table))
+                       if name.startswith('part-') and not name.endswith('.tmp'))
+        ranges = [tuple(_stem(name).split('~')) for name in names if '~' in name]
+        return names, ranges
+
+    def _visible_parts(self, table):
+        names, ranges = self._list_parts(table)
+        return [name for name in names if '~' in name or not _covered(_stem(name), ranges)]
+
+    def _remove_merged(self, directory, names, ranges):
+        # Delete parts merged into a compacted part more than COMPACT_GRACE ago
+        compacted_before = time.time() - self.COMPACT_GRACE
+        settled = []
+        for name in names:
+            if '~' in name:
+                try:
+                    if os.path.getmtime(os.path.join(directory, name)) < compacted_before:
+                        settled.append(tuple(_stem(name).split('~')))
+                except FileNotFoundError:
+                    continue
+        for name in names:
+            if '~' not in name and _covered(_stem(name), settled):
+                try:
+                    os.remove(os.path.join(directory, name))
+                except FileNotFoundError:
+                    pass
+
+    def _read_part(self, path):
+        if path.endswith('.parquet'):
+            return pd.read_parquet(path)
+        frame = pd.read_csv(path)
+        frame['timestamp'] = pd.to_datetime(frame['timestamp'], utc=True)
+        return frame
+
+def _parquet_available():
+    for engine in ('pyarrow', 'fastparquet'):
+        try:
+            __import__(engine)
+            return True
+        except ImportError:
+            continue
+    return False
+
+def _stem(name):
+    return name.rsplit('.', 1)[0]
+
+def _covered(stem, ranges):
+    return any(first <= stem <= last for first, last in ranges)
+
+def _now():
+    return datetime.now(timezone.utc)
@@ -1,12 +1,19 @@
 import os
 import re
+import zipfile
 import pandas as pd
+from xml.etree import ElementTree
 from datetime import datetime
+from app.utils.vocabulary import get_default_matcher
 
 def analyze_document(document_path):
     """
     Analyze the uploaded document for weed-related information.
     
+    The document is read one page (PDF) or paragraph (DOCX) at a time and
+    the findings are accumulated as it goes, so the text of the whole
+    document is never held at once.
+    
     Args:
         document_path (str): Path to the uploaded document.
         
@@ -18,31 +25,22 @@ def analyze_document(document_path):
         _, ext = os.path.splitext(document_path)
         ext = ext.lower()
         
-        # Extract text based on file type
-        if ext in ['.pdf']:
-            # In a real application, this would use a PDF parser like PyPDF2 or pdfplumber
-            # For demonstration, we'll simulate extracted text
-            extracted_text = simulate_pdf_extraction()
-            
-        elif ext in ['.doc', '.docx']:
-            # In a real application, this would use python-docx
-            # For demonstration, we'll simulate extracted text
-            extracted_text = simulate_docx_extraction()
-            
-        else:
+        if ext not in ['.pdf', '.doc', '.docx']:
             return {
                 'status': 'error',
                 'message': f'Unsupported file format: {ext}. Please upload PDF, DOC, or DOCX files.'
             }
         
-        # Process the extracted text
+        # Process the extracted text page by page
         # In a real application, this would use NLP techniques
-        analysis_results = process_document_text(extracted_text)
+        accumulator = DocumentTextAccumulator()
+        for text in iter_document_text(document_path):
+            accumulator.feed(text)
         
         return {
             'status': 'success',
             'document_path': document_path,
-            'analysis': analysis_results
+            'analysis': accumulator.result()
         }
         
     except Exception as e:
@@ -51,93 +49,237 @@ def analyze_document(document_path):
             'message': f'Error analyzing document: {str(e)}'
         }
 
-def process_document_text(text):
+def iter_document_text(document_path, start_page=None, stop_page=None):
+    """
+    Yield the text of a document one page or paragraph at a time.
+    
+    PDFs are read with pypdf, one page at a time. DOCX files are streamed
+    straight from their XML, one paragraph at a time, including paragraphs
+    in table cells, headers and footers. Legacy .doc files, and PDFs when
+    pypdf isn't installed, fall back to the simulated text.
+    
+    Args:
+        document_path (str): Path to the document.
+        start_page (int): First PDF page to read (0-based); ignored for
+            other formats.
+        stop_page (int): PDF page to stop before; None reads to the end.
+        
+    Yields:
+        str: Text of the next page or paragraph.
+    """
+    _, ext = os.path.splitext(document_path)
+    ext = ext.lower()
+    
+    if ext == '.pdf':
+        try:
+            from pypdf import PdfReader
+        except ImportError:
+            print("pypdf is not installed; using simulated PDF text")
+            yield simulate_pdf_extraction()
+            return
+        
+        # Given a path, pypdf copies the whole file into memory. From an open
+        # file it reads the cross-reference table and page tree up front and
+        # each page's content from disk as its text is extracted (pypdf does
+        # keep the objects it has parsed).
+        with open(document_path, 'rb') as f:
+            pages = PdfReader(f).pages
+            for index in range(start_page or 0, len(pages) if stop_page is None else min(stop_page, len(pages))):
+                yield pages[index].extract_text() or ''
+        
+    elif ext == '.docx':
+        yield from _iter_docx_paragraphs(document_path)
+        
+    elif ext == '.doc':
+        # The legacy binary format has no pure-Python parser
+        # For demonstration, we'll simulate extracted text
+        yield simulate_docx_extraction()
+        
+    else:
+        raise ValueError(f'Unsupported file format: {ext}')
+
+# WordprocessingML namespace, as it appears in ElementTree tags
+_W = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+
+# Parts of a DOCX file holding text, in the order they are read
+_DOCX_TEXT_PART = re.compile(r'word/(document|header\d*|footer\d*)\.xml')
+
+def _iter_docx_paragraphs(document_path):
+    """
+    Yield the text of every paragraph in a DOCX file.
+    
+    The XML is parsed incrementally and each paragraph is discarded once its
+    text is yielded, so memory use is bounded by the largest paragraph
+    rather than the whole document.
+    """
+    with zipfile.ZipFile(document_path) as archive:
+        names = [name for name in archive.namelist() if _DOCX_TEXT_PART.fullmatch(name)]
+        # The body first, then headers and footers
+        names.sort(key=lambda name: (not name.endswith('document.xml'), name))
+        
+        for name in names:
+            with archive.open(name) as xml:
+                container = None
+                for event, element in ElementTree.iterparse(xml, events=('start', 'end')):
+                    if event == 'start':
+                        if element.tag in (_W + 'body', _W + 'hdr', _W + 'ftr'):
+                            container = element
+                        continue
+                    
+                    if element.tag == _W + 'p':
+                        yield _paragraph_text(element)
+                        # Also keeps a paragraph nested in a text box from
+                        # being counted again with the one around it
+                        element.clear()
+                    
+                    # Drop finished tables and paragraphs from the tree
+                    if container is not None and len(container) and container[-1] is element:
+                        del container[:]
+
+def _paragraph_text(paragraph):
+    """Return the text of a w:p element the way Word shows it."""
+    parts = []
+    for element in paragraph.iter():
+        if element.tag == _W + 't':
+            parts.append(element.text or '')
+        elif element.tag == _W + 'tab':
+            parts.append('\t')
+        elif element.tag in (_W + 'br', _W + 'cr'):
+            parts.append('\n')
+    return ''.join(parts)
+
+class DocumentTextAccumulator:
+    """
+    Builds the document analysis incrementally from pieces of text.
+    
+    Feeding a document page by page gives the same result as
+    process_document_text on the whole text, except for matches that span
+    a page break.
+    """
+    
+    # Potential field/location information
+    # In a real application, this would use named entity recognition
+    LOCATION_PATTERN = re.compile(r'\b(field|garden|plot|area|section|zone)\s+([A-Za-z0-9-]+)\b', re.IGNORECASE)
+    
+    # Potential dates
+    DATE_PATTERN = re.compile(r'\b\d{1,2}/\d{1,2}/\d{2,4}\b|\b\d{1,2}-\d{1,2}-\d{2,4}\b')
+    
+    def __init__(self, matcher=None):
+        """
+        Args:
+            matcher (VocabularyMatcher): Terms to count, with categories
+                'weed_mentions', 'growth_stages' and 'treatments'. Defaults
+                to the species knowledge base and app/data/vocabulary.json.
+        """
+        self.matcher = matcher or get_default_matcher()
+        self.term_counts = {}
+        self.locations = []
+        self.dates = []
+    
+    def feed(self, text):
+        """
+        Add the findings from one piece of text.
+        
+        Args:
+            text (str): Text of a page, paragraph or whole document.
+        """
+        for term, count in self.matcher.count_terms(text).items():
+            self.term_counts[term] = self.term_counts.get(term, 0) + count
+        
+        self.locations.extend(self.LOCATION_PATTERN.findall(text))
+        self.dates.extend(self.DATE_PATTERN.findall(text))
+    
+    def state(self):
+        """
+        Get the raw findings so far, e.g. to send back from a worker process.
+        
+        Returns:
+            dict: Picklable state that can be passed to merge.
+        """
+        return {
+            'term_counts': self.term_counts,
+            'locations': self.locations,
+            'dates': self.dates
+        }
+    
+    def merge(self, state):
+        """
+        Add the findings from another accumulator's state.
+        
+        Merge states in document order so locations and dates stay in order.
+        
+        Args:
+            state (dict): Result of state() on another accumulator.
+        """
+        for term, count in state['term_counts'].items():
+            self.term_counts[term] = self.term_counts.get(term, 0) + count
+        
+        self.locations.extend(state['locations'])
+        self.dates.extend(state['dates'])
+    
+    def result(self):
+        """
+        Summarize everything fed so far.
+        
+        Returns:
+            dict: Processed information about weeds, growth stages, and remedies.
+        """
+        mentions = self.matcher.categorize(self.term_counts)
+        
+        weed_mentions = mentions.get('weed_mentions', {})
+        stage_mentions = mentions.get('growth_stages', {})
+        treatment_mentions = mentions.get('treatments', {})
+        
+        # Create summary of findings
+        primary_weeds = sorted(weed_mentions.items(), key=lambda x: x[1], reverse=True)
+        primary_stages = sorted(stage_mentions.items(), key=lambda x: x[1], reverse=True)
+        primary_treatments = sorted(treatment_mentions.items(), key=lambda x: x[1], reverse=True)
+        
+        # Create simple sentences based on findings
+        conclusions = []
+        
+        if primary_weeds:
+            weed_text = f"The document primarily discusses {', '.join([w[0] for w in primary_weeds[:3]])}."
+            conclusions.append(weed_text)
+        
+        if primary_stages:
+            stage_text = f"Growth stages mentioned include {', '.join([s[0] for s in primary_stages])}."
+            conclusions.append(stage_text)
+        
+        if primary_treatments:
+            treatment_text = f"Recommended treatments include {', '.join([t[0] for t in primary_treatments[:3]])}."
+            conclusions.append(treatment_text)
+        
+        if not conclusions:
+            conclusions.append("No specific weed information was detected in the document.")
+        
+        return {
+            'weed_mentions': weed_mentions,
+            'growth_stages': stage_mentions,
+            'treatments': treatment_mentions,
+            'locations': list(self.locations),
+            'dates': list(self.dates),
+            'summary': ' '.join(conclusions)
+        }
+
+def process_document_text(text, matcher=None):
     """
     Process the extracted text to identify weed-related information.
     
     Args:
         text (str): Extracted text from the document.
+        matcher (VocabularyMatcher): Terms to count, with categories
+            'weed_mentions', 'growth_stages' and 'treatments'. Defaults to
+            the species knowledge base and app/data/vocabulary.json.
         
     Returns:
         dict: Processed information about weeds, growth stages, and remedies.
     """
     # In a real application, this would use NLP and ML techniques
     # For demonstration, we'll use simple pattern matching
-    
-    # Common weed types to look for
-    weed_types = [
-        "Dandelion", "Crabgrass", "Thistle", "Chickweed", "Bindweed",
-        "Nutsedge", "Purslane", "Pigweed", "Wild Mustard", "Foxtail"
-    ]
-    
-    # Growth stages to look for
-    growth_stages = ["Seedling", "Vegetative", "Flowering", "Mature"]
-    
-    # Treatment methods to look for
-    treatments = [
-        "herbicide", "manual removal", "tilling", "mulching", "soil amendment",
-        "organic control", "chemical control", "preventive measure"
-    ]
-    
-    # Count occurrences
-    weed_mentions = {}
-    for weed in weed_types:
-        count = len(re.findall(r'\b' + re.escape(weed) + r'\b', text, re.IGNORECASE))
-        if count > 0:
-            weed_mentions[weed] = count
-    
-    stage_mentions = {}
-    for stage in growth_stages:
-        count = len(re.findall(r'\b' + re.escape(stage) + r'\b', text, re.IGNORECASE))
-        if count > 0:
-            stage_mentions[stage] = count
-    
-    treatment_mentions = {}
-    for treatment in treatments:
-        count = len(re.findall(r'\b' + re.escape(treatment) + r'\b', text, re.IGNORECASE))
-        if count > 0:
-            treatment_mentions[treatment] = count
-    
-    # Extract potential field/location information
-    # In a real application, this would use named entity recognition
-    location_pattern = r'\b(field|garden|plot|area|section|zone)\s+([A-Za-z0-9-]+)\b'
-    locations = re.findall(location_pattern, text, re.IGNORECASE)
-    
-    # Extract potential dates
-    date_pattern = r'\b\d{1,2}/\d{1,2}/\d{2,4}\b|\b\d{1,2}-\d{1,2}-\d{2,4}\b'
-    dates = re.findall(date_pattern, text)
-    
-    # Create summary of findings
-    primary_weeds = sorted(weed_mentions.items(), key=lambda x: x[1], reverse=True)
-    primary_stages = sorted(stage_mentions.items(), key=lambda x: x[1], reverse=True)
-    primary_treatments = sorted(treatment_mentions.items(), key=lambda x: x[1], reverse=True)
-    
-    # Create simple sentences based on findings
-    conclusions = []
-    
-    if primary_weeds:
-        weed_text = f"The document primarily discusses {', '.join([w[0] for w in primary_weeds[:3]])}."
-        conclusions.append(weed_text)
-    
-    if primary_stages:
-        stage_text = f"Growth stages mentioned include {', '.join([s[0] for s in primary_stages])}."
-        conclusions.append(stage_text)
-    
-    if primary_treatments:
-        treatment_text = f"Recommended treatments include {', '.join([t[0] for t in primary_treatments[:3]])}."
-        conclusions.append(treatment_text)
-    
-    if not conclusions:
-        conclusions.append("No specific weed information was detected in the document.")
-    
-    return {
-        'weed_mentions': weed_mentions,
-        'growth_stages': stage_mentions,
-        'treatments': treatment_mentions,
-        'locations': locations,
-        'dates': dates,
-        'summary': ' '.join(conclusions)
-    }
+    accumulator = DocumentTextAccumulator(matcher)
+    accumulator.feed(text)
+    return accumulator.result()
 
 def simulate_pdf_extraction():
     """Simulate extracting text from a PDF for demonstration purposes."""
@@ -0,0 +1,231 @@
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from app.utils.document_analyzer import DocumentTextAccumulator, iter_document_text
+
+# Document types the analyzer accepts
+DOCUMENT_EXTENSIONS = ('.pdf', '.doc', '.docx')
+
+class DocumentAnalysisPool:
+    """
+    Runs document analysis in worker processes.
+
+    The regex scanning in document analysis is CPU-bound and holds the GIL,
+    so it runs in a process pool instead of on the request thread. Large
+    PDFs are split into page ranges analyzed in parallel, and the partial
+    results are merged in page order, so the output matches analyze_document.
+    If a worker dies (for example out of memory on a huge PDF) the pool is
+    replaced, and the documents it was working on come back as errors.
+    Every range re-opens the PDF and parses its cross-reference table and
+    page tree, so a document is split into at most one range per worker.
+    """
+
+    def __init__(self, max_workers=None, pages_per_chunk=20):
+        """
+        Args:
+            max_workers (int): Number of worker processes; defaults to the
+                number of CPUs.
+            pages_per_chunk (int): Fewest PDF pages analyzed per task;
+                larger PDFs get bigger ranges so there is at most one
+                per worker.
+        """
+        self.max_workers = max_workers
+        self.pages_per_chunk = pages_per_chunk
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        """
+        Start the worker processes now rather than on the first document.
+
+        On platforms that fork, call this before starting other threads
+        (such as the model loader) so workers don't inherit their state.
+        """
+        self._get_executor().submit(_noop).result()
+
+    def shutdown(self, wait=True):
+        """Stop the worker processes."""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=wait)
+                self._executor = None
+
+    def analyze(self, document_path):
+        """
+        Analyze one document, splitting large PDFs across workers.
+
+        Args:
+            document_path (str): Path to the document.
+
+        Returns:
+            dict: Analysis results, as returned by analyze_document.
+        """
+        return self.analyze_many([document_path])[0]
+
+    def analyze_many(self, document_paths, progress_callback=None):
+        """
+        Analyze several documents in parallel.
+
+        Args:
+            document_paths (list): Paths to the documents.
+            progress_callback (callable): Called as
+                progress_callback(completed, total, document_path, result)
+                each time a document finishes.
+
+        Returns:
+            list: Analysis results in the same order as document_paths.
+        """
+        total = len(document_paths)
+        results = [None] * total
+        chunk_states = {}
+        chunks_left = {}
+        future_chunks = {}
+
+        for index, document_path in enumerate(document_paths):
+            try:
+                ranges = self._page_ranges(document_path)
+            except ValueError as e:
+                results[index] = {'status': 'error', 'message': str(e)}
+                continue
+            except Exception as e:
+                results[index] = _error_result(document_path, e)
+                continue
+
+            chunk_states[index] = [None] * len(ranges)
+            chunks_left[index] = len(ranges)
+            for chunk, (start, stop) in enumerate(ranges):
+                executor = self._get_executor()
+                try:
+                    future = executor.submit(_analyze_pages, document_path, start, stop)
+                except BrokenProcessPool as e:
+                    self._discard_executor(executor)
+                    results[index] = _error_result(document_path, e)
+                    break
+                future_chunks[future] = (index, chunk, executor)
+
+        completed = 0
+        for index, result in enumerate(results):
+            if result is not None:
+                completed += 1
+                _report(progress_callback, completed, total, document_paths[index], result)
+
+        for future in as_completed(future_chunks):
+            index, chunk, executor = future_chunks[future]
+            if results[index] is not None:
+                continue
+
+            try:
+                chunk_states[index][chunk] = future.result()
+            except BrokenProcessPool as e:
+                # A worker died; the next document gets a fresh pool
+                self._discard_executor(executor)
+                results[index] = _error_result(document_paths[index], e)
+            except Exception as e:
+                results[index] = _error_result(document_paths[index], e)
+            else:
+                chunks_left[index] -= 1
+                if chunks_left[index] > 0:
+                    continue
+
+                # Merge the page ranges back in document order
+                accumulator = DocumentTextAccumulator()
+                for state in chunk_states[index]:
+                    accumulator.merge(state)
+                results[index] = {
+                    'status': 'success',
+                    'document_path': document_paths[index],
+                    'analysis': accumulator.result()
+                }
+
+            chunk_states.pop(index, None)
+            completed += 1
+            _report(progress_callback, completed, total, document_paths[index], results[index])
+
+        return results
+
+    def analyze_directory(self, directory, progress_callback=None, recursive=False):
+        """
+        Analyze every PDF, DOC and DOCX document in a directory.
+
+        Args:
+            directory (str): Directory to scan.
+            progress_callback (callable): See analyze_many.
+            recursive (bool): Also scan subdirectories.
+
+        Returns:
+            dict: Document path -> analysis results, in sorted path order.
+        """
+        document_paths = []
+        for root, dirs, files in os.walk(directory):
+            document_paths.extend(
+                os.path.join(root, name) for name in files
+                if os.path.splitext(name)[1].lower() in DOCUMENT_EXTENSIONS
+            )
+            if not recursive:
+                break
+
+        document_paths.sort()
+        results = self.analyze_many(document_paths, progress_callback)
+        return dict(zip(document_paths, results))
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            return self._executor
+
+    def _discard_executor(self, executor):
+        # Drop a broken pool, unless another call has already replaced it
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+        executor.shutdown(wait=False)
+
+    def _page_ranges(self, document_path):
+        ext = os.path.splitext(document_path)[1].lower()
+        if ext not in DOCUMENT_EXTENSIONS:
+            raise ValueError(f'Unsupported file format: {ext}. Please upload PDF, DOC, or DOCX files.')
+
+        # Only PDFs can be read a page range at a time
+        page_count = _pdf_page_count(document_path) if ext == '.pdf' else None
+        if not page_count:
+            return [(None, None)]
+
+        workers = self.max_workers or os.cpu_count() or 1
+        chunk = max(self.pages_per_chunk, -(-page_count // workers))
+        return [(start, min(start + chunk, page_count))
+                for start in range(0, page_count, chunk)]
+
+def _analyze_pages(document_path, start_page, stop_page):
+    # Runs in a worker process
+    accumulator = DocumentTextAccumulator()
+    for text in iter_document_text(document_path, start_page, stop_page):
+        accumulator.feed(text)
+    return accumulator.state()
+
+def _pdf_page_count(document_path):
+    try:
+        from pypdf import PdfReader
+    except ImportError:
+        return None
+    # From an open file, so pypdf doesn't copy the whole PDF into memory
+    with open(document_path, 'rb') as f:
+        return len(PdfReader(f).pages)
+
+def _error_result(document_path, error):
+    return {
+        'status': 'error',
+        'document_path': document_path,
+        'message': f'Error analyzing document: {str(error)}'
+    }
+
+def _report(progress_callback, completed, total, document_path, result):
+    if progress_callback is not None:
+        try:
+            progress_callback(completed, total, document_path, result)
+        except Exception as e:
+            print(f"Error in document analysis progress callback: {e}")
+
+def _noop():
+    return None
@@ -0,0 +1,66 @@
+import math
+import cv2
+import numpy as np
+
+# HSV range treated as green vegetation
+GREEN_LOWER = np.array([35, 50, 50])
+GREEN_UPPER = np.array([85, 255, 255])
+
+# Methods accepted by estimate_green_coverage
+COVERAGE_METHODS = ('full', 'stride', 'downscale')
+
+def estimate_green_coverage(frame, method='full', stride=4, scale=0.25, z=1.96):
+    """
+    Estimate the percentage of green pixels in an image.
+
+    'full' classifies every pixel and is exact. 'stride' classifies every
+    stride-th pixel in each direction and 'downscale' classifies an area-
+    averaged copy of the image at the given scale; both touch a fraction of
+    the pixels. For 'stride' the error bound is the half-width of a
+    normal-approximation confidence interval for the sampled proportion
+    (z=1.96 is 95%). It treats samples as independent, so it can be checked
+    against method='full' on representative images. Area averaging blends
+    colors at vegetation edges instead of sampling pixels, so its error
+    isn't a sampling error and 'downscale' returns no bound.
+
+    Args:
+        frame (ImageFrame): The decoded image.
+        method (str): One of COVERAGE_METHODS.
+        stride (int): Sampling step for 'stride'.
+        scale (float): Resize factor for 'downscale'.
+        z (float): Normal quantile for the error bound.
+
+    Returns:
+        tuple: (green percentage, error bound in percentage points, or
+            None for 'downscale').
+    """
+    if method == 'full':
+        # Reuses the frame's HSV plane if another stage already computed it
+        hsv = frame.hsv
+    elif method == 'stride':
+        if frame.has_hsv:
+            hsv = frame.hsv[::stride, ::stride]
+        else:
+            sample = np.ascontiguousarray(frame.image[::stride, ::stride])
+            hsv = cv2.cvtColor(sample, cv2.COLOR_BGR2HSV)
+    elif method == 'downscale':
+        small = cv2.resize(frame.image, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+        hsv = cv2.cvtColor(small, cv2.COLOR_BGR2HSV)
+    else:
+        raise ValueError(f"Unknown coverage method: {method}. Choose from {', '.join(COVERAGE_METHODS)}.")
+
+    green_mask = cv2.inRange(hsv, GREEN_LOWER, GREEN_UPPER)
+    samples = green_mask.shape[0] * green_mask.shape[1]
+    proportion = np.count_nonzero(green_mask) / samples
+
+    if method == 'full':
+        error = 0.0
+    elif method == 'downscale':
+        return proportion * 100, None
+    elif 0 < proportion < 1:
+        error = z * math.sqrt(proportion * (1 - proportion) / samples)
+    else:
+        # No variation in the sample; fall back to the rule of three
+        error = 3 / samples
+
+    return proportion * 100, error * 100
@@ -0,0 +1,107 @@
+import os
+import cv2
+import numpy as np
+
+class ImageFrame:
+    """
+    A decoded image shared by every stage of a single request.
+
+    The pixel buffer is decoded once and derived planes (such as HSV) are
+    computed on first use, so detection, classification and growth stage
+    analysis never read the same file twice.
+    """
+
+    def __init__(self, image, name=None):
+        """
+        Wrap an already decoded BGR image.
+
+        Args:
+            image (numpy.ndarray): BGR pixel buffer.
+            name (str): Original filename, used to name derived files.
+        """
+        if image is None:
+            raise ValueError("Image could not be decoded")
+
+        self.image = image
+        self.name = name
+        self._hsv = None
+        self._hue_integral = None
+
+    @classmethod
+    def from_path(cls, image_path):
+        """
+        Decode an image file from disk.
+
+        Args:
+            image_path (str): Path to the input image.
+
+        Returns:
+            ImageFrame: The decoded frame.
+        """
+        image = cv2.imread(image_path)
+        if image is None:
+            raise ValueError(f"Could not read image: {image_path}")
+        return cls(image, name=os.path.basename(image_path))
+
+    @classmethod
+    def from_bytes(cls, data, name=None):
+        """
+        Decode an encoded image (e.g. an upload stream) without touching disk.
+
+        Args:
+            data (bytes): Encoded image bytes.
+            name (str): Original filename, used to name derived files.
+
+        Returns:
+            ImageFrame: The decoded frame.
+        """
+        image = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+        if image is None:
+            raise ValueError(f"Could not decode image: {name or 'upload'}")
+        return cls(image, name=name)
+
+    @property
+    def hsv(self):
+        """HSV plane of the image, computed on first access."""
+        if self._hsv is None:
+            self._hsv = cv2.cvtColor(self.image, cv2.COLOR_BGR2HSV)
+        return self._hsv
+
+    @property
+    def has_hsv(self):
+        """Whether the HSV plane has already been computed."""
+        return self._hsv is not None
+
+    @property
+    def hue_integral(self):
+        """
+        Summed-area table of the hue channel, computed on first access.
+
+        Entry [y, x] holds the sum of hue over image[:y, :x], so the total
+        hue of any rectangle can be read from four corners.
+        """
+        if self._hue_integral is None:
+            self._hue_integral = cv2.integral(self.hsv[:, :, 0], sdepth=cv2.CV_64F)
+        return self._hue_integral
+
+    @property
+    def height(self):
+        return self.image.shape[0]
+
+    @property
+    def width(self):
+        return self.image.shape[1]
+
+def as_frame(image):
+    """
+    Return an ImageFrame for a path or an existing frame.
+
+    Args:
+        image (str or ImageFrame): Path to the input image, or a decoded frame.
+
+    Returns:
+        ImageFrame: The decoded frame.
+    """
+    if isinstance(image, ImageFrame):
+        return image
+    return ImageFrame.from_path(image)
@@ -0,0 +1,188 @@
+import os
+import numpy as np
+
+# Supported inference backends and the ultralytics export format for each
+BACKENDS = {
+    'torch': None,
+    'onnx': 'onnx',
+    'openvino': 'openvino'
+}
+
+def exported_weights_path(model_path, backend):
+    """
+    Get where the export of a model for a backend is cached.
+
+    Exports live next to the PyTorch weights, using the names ultralytics
+    gives them (yolov8n.onnx, yolov8n_openvino_model/).
+
+    Args:
+        model_path (str): Path to the PyTorch .pt weights.
+        backend (str): One of BACKENDS.
+
+    Returns:
+        str: Path to the exported model.
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown inference backend: {backend}. Choose from {', '.join(BACKENDS)}.")
+
+    stem, _ = os.path.splitext(model_path)
+    if backend == 'onnx':
+        return f"{stem}.onnx"
+    if backend == 'openvino':
+        return f"{stem}_openvino_model"
+    return model_path
+
+def prepare_weights(model_path, backend, imgsz=640):
+    """
+    Export the PyTorch weights for a backend once and reuse the export after.
+
+    Args:
+        model_path (str): Path to the PyTorch .pt weights.
+        backend (str): One of BACKENDS.
+        imgsz (int): Input size the export is built for.
+
+    Returns:
+        str: Path of the weights to load for the backend.
+    """
+    export_path = exported_weights_path(model_path, backend)
+    if backend == 'torch' or os.path.exists(export_path):
+        return export_path
+
+    from ultralytics import YOLO
+
+    print(f"Exporting YOLOv8 model to {backend}...")
+    exported = YOLO(model_path).export(format=BACKENDS[backend], imgsz=imgsz)
+    return str(exported)
+
+def set_thread_count(model, backend, weights_path, num_threads):
+    """
+    Limit the CPU threads a loaded model uses for inference.
+
+    ultralytics doesn't expose runtime thread settings, so for ONNX Runtime
+    and OpenVINO the session it created is rebuilt with the requested
+    count. For those backends call this after the first inference, once the
+    predictor exists, and warm up again when it returns True: the rebuilt
+    session hasn't run yet. For torch the setting is global, so call it
+    before the first inference.
+
+    Args:
+        model: A loaded ultralytics YOLO model.
+        backend (str): One of BACKENDS.
+        weights_path (str): Path the model was loaded from.
+        num_threads (int): Number of threads; None leaves the default.
+
+    Returns:
+        bool: True if the inference session was rebuilt.
+    """
+    if not num_threads:
+        return False
+
+    if backend == 'torch':
+        import torch
+        torch.set_num_threads(num_threads)
+        return False
+
+    runtime = getattr(getattr(model, 'predictor', None), 'model', None)
+
+    if backend == 'onnx' and hasattr(runtime, 'session'):
+        import onnxruntime
+
+        options = onnxruntime.SessionOptions()
+        options.intra_op_num_threads = num_threads
+        options.inter_op_num_threads = 1
+        runtime.session = onnxruntime.InferenceSession(
+            weights_path,
+            sess_options=options,
+            providers=runtime.session.get_providers()
+        )
+        return True
+
+    elif backend == 'openvino' and hasattr(runtime, 'ov_compiled_model'):
+        import openvino as ov
+
+        core = ov.Core()
+        xml_path = next(
+            os.path.join(weights_path, name)
+            for name in os.listdir(weights_path) if name.endswith('.xml')
+        )
+        runtime.ov_compiled_model = core.compile_model(
+            core.read_model(xml_path),
+            device_name='CPU',
+            config={'PERFORMANCE_HINT': 'LATENCY', 'INFERENCE_NUM_THREADS': num_threads}
+        )
+        return True
+
+    print(f"Could not set thread count for the {backend} backend")
+    return False
+
+def compare_detections(reference, candidate, box_tolerance=2.0, conf_tolerance=0.05):
+    """
+    Check that two backends produced the same detections within a tolerance.
+
+    Boxes are paired greedily by class and highest IoU.
+
+    Args:
+        reference: ultralytics Results from the PyTorch model.
+        candidate: ultralytics Results from the backend under test.
+        box_tolerance (float): Maximum allowed coordinate difference in pixels.
+        conf_tolerance (float): Maximum allowed confidence difference.
+
+    Returns:
+        dict: 'match' (bool), the largest box and confidence differences,
+            and the number of boxes left unpaired on either side.
+    """
+    ref_boxes = reference.boxes.cpu().numpy()
+    cand_boxes = candidate.boxes.cpu().numpy()
+
+    unmatched = list(range(len(cand_boxes.conf)))
+    max_box_error = 0.0
+    max_conf_error = 0.0
+    missing = 0
+
+    for i in range(len(ref_boxes.conf)):
+        same_class = [j for j in unmatched if cand_boxes.cls[j] == ref_boxes.cls[i]]
+        if not same_class:
+            missing += 1
+            continue
+
+        ious = [_iou(ref_boxes.xyxy[i], cand_boxes.xyxy[j]) for j in same_class]
+        j = same_class[int(np.argmax(ious))]
+        unmatched.remove(j)
+
+        max_box_error = max(max_box_error, float(np.max(np.abs(ref_boxes.xyxy[i] - cand_boxes.xyxy[j]))))
+        max_conf_error = max(max_conf_error, float(abs(ref_boxes.conf[i] - cand_boxes.conf[j])))
+
+    return {
+        'match': (missing == 0 and not unmatched
+                  and max_box_error <= box_tolerance and max_conf_error <= conf_tolerance),
+        'max_box_error': max_box_error,
+        'max_conf_error': max_conf_error,
+        'unmatched': missing + len(unmatched)
+    }
+
+def check_backend_parity(model_path, backend_model, image, conf=0.25, **tolerances):
+    """
+    Run an image through the PyTorch weights and a backend model and compare.
+
+    Args:
+        model_path (str): Path to the PyTorch .pt weights.
+        backend_model: A loaded ultralytics YOLO model for the backend.
+        image (numpy.ndarray): BGR image to run.
+        conf (float): Detection confidence threshold.
+        **tolerances: box_tolerance / conf_tolerance for compare_detections.
+
+    Returns:
+        dict: The comparison from compare_detections.
+    """
+    from ultralytics import YOLO
+
+    reference = YOLO(model_path)(image, conf=conf, verbose=False)[0]
+    candidate = backend_model(image, conf=conf, verbose=False)[0]
+    return compare_detections(reference, candidate, **tolerances)
+
+def _iou(a, b):
+    x1, y1 = max(a[0], b[0]), max(a[1], b[1])
+    x2, y2 = min(a[2], b[2]), min(a[3], b[3])
+    inter = max(0.0, x2 - x1) * max(0.0, y2 - y1)
+    union = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - inter
+    return inter / union if union > 0 else 0.0
@@ -0,0 +1,122 @@
+import threading
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+class QueueFullError(Exception):
+    """Raised when a job is submitted while the queue is at its depth limit."""
+
+class JobQueue:
+    """
+    In-process background job queue with a bounded worker pool.
+
+    Jobs run on a fixed number of worker threads. Once the number of queued
+    and running jobs reaches max_pending, new submissions are rejected so a
+    burst of slow requests cannot grow the backlog without limit. Finished
+    jobs are kept for polling until max_finished newer ones have completed.
+    A job fails if it raises or, like the detector methods, returns a dict
+    with an 'error' key.
+    """
+
+    def __init__(self, max_workers=2, max_pending=32, max_finished=256):
+        """
+        Args:
+            max_workers (int): Number of worker threads running jobs.
+            max_pending (int): Maximum number of queued plus running jobs.
+            max_finished (int): Number of finished jobs kept for polling.
+        """
+        self.max_pending = max_pending
+        self.max_finished = max_finished
+        self._executor = ThreadPoolExecutor(max_workers=max_workers,
+                                            thread_name_prefix='job-worker')
+        self._lock = threading.Lock()
+        self._jobs = OrderedDict()
+        self._pending = 0
+
+    def submit(self, func, *args, **kwargs):
+        """
+        Queue a function call to run in the background.
+
+        Args:
+            func (callable): The function to run.
+            *args: Positional arguments for func.
+            **kwargs: Keyword arguments for func.
+
+        Returns:
+            str: The id of the new job.
+
+        Raises:
+            QueueFullError: If max_pending jobs are already queued or running.
+        """
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise QueueFullError(f"Job queue is full ({self.max_pending} pending jobs)")
+
+            job_id = uuid.uuid4().hex
+            self._jobs[job_id] = {
+                'id': job_id,
+                'status': 'queued',
+                'submitted_at': _now()
+            }
+            self._pending += 1
+
+        self._executor.submit(self._run, job_id, func, args, kwargs)
+        return job_id
+
+    def get(self, job_id):
+        """
+        Get a snapshot of a job's status.
+
+        Args:
+            job_id (str): The id returned by submit.
+
+        Returns:
+            dict: Job status with 'result' or 'error' once finished, or None
+                if the job is unknown or has been evicted.
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job is not None else None
+
+    def pending(self):
+        """Return the number of queued and running jobs."""
+        with self._lock:
+            return self._pending
+
+    def shutdown(self, wait=True):
+        """Stop accepting jobs and optionally wait for running ones."""
+        self._executor.shutdown(wait=wait)
+
+    def _run(self, job_id, func, args, kwargs):
+        self._update(job_id, status='running', started_at=_now())
+
+        try:
+            result = func(*args, **kwargs)
+            if isinstance(result, dict) and 'error' in result:
+                print(f"Background job {job_id} failed: {result['error']}")
+                self._update(job_id, status='failed', error=result['error'])
+            else:
+                self._update(job_id, status='finished', result=result)
+        except Exception as e:
+            print(f"Error in background job {job_id}: {e}")
+            self._update(job_id, status='failed', error=str(e))
+        finally:
+            with self._lock:
+                self._pending -= 1
+                self._jobs[job_id]['finished_at'] = _now()
+                self._evict_finished()
+
+    def _update(self, job_id, **fields):
+        with self._lock:
+            self._jobs[job_id].update(fields)
+
+    def _evict_finished(self):
+        # Jobs are kept in submission order, so the oldest finished go first
+        finished = [job_id for job_id, job in self._jobs.items()
+                    if job['status'] in ('finished', 'failed')]
+        for job_id in finished[:max(0, len(finished) - self.max_finished)]:
+            del self._jobs[job_id]
+
+def _now():
+    return datetime.now().strftime('%Y-%m-%d %H:%M:%S')
@@ -0,0 +1,144 @@
+import json
+import random
+import threading
+
+class FixedLatency:
+    """The same delay every time; FixedLatency(0) disables delays."""
+
+    def __init__(self, seconds):
+        self.seconds = max(0.0, float(seconds))
+
+    def sample(self):
+        return self.seconds
+
+class UniformLatency:
+    """Delays drawn uniformly between low and high seconds."""
+
+    def __init__(self, low, high, rng=None):
+        self.low = float(low)
+        self.high = float(high)
+        self._rng = rng or random.Random()
+        self._lock = threading.Lock()
+
+    def sample(self):
+        with self._lock:
+            return self._rng.uniform(self.low, self.high)
+
+class NormalLatency:
+    """Normally distributed delays, clipped at zero."""
+
+    def __init__(self, mean, stddev, rng=None):
+        self.mean = float(mean)
+        self.stddev = float(stddev)
+        self._rng = rng or random.Random()
+        self._lock = threading.Lock()
+
+    def sample(self):
+        with self._lock:
+            return max(0.0, self._rng.gauss(self.mean, self.stddev))
+
+class ReplayLatency:
+    """Delays replayed in order from a recorded trace, starting over at the end."""
+
+    def __init__(self, samples):
+        if not samples:
+            raise ValueError("Latency trace is empty")
+        self.samples = [max(0.0, float(sample)) for sample in samples]
+        self._next = 0
+        self._lock = threading.Lock()
+
+    def sample(self):
+        with self._lock:
+            seconds = self.samples[self._next]
+            self._next = (self._next + 1) % len(self.samples)
+        return seconds
+
+def load_trace(path, operation=None):
+    """
+    Read recorded latencies, in seconds, from a file.
+
+    The file is either JSON or plain text with one number per line (the
+    first column of a CSV also works). JSON can be a list of numbers, or an
+    object mapping operation names to lists.
+
+    Args:
+        path (str): Path to the trace file.
+        operation (str): Which list to read from an object of traces.
+
+    Returns:
+        list: Latencies in seconds.
+
+    Raises:
+        ValueError: If the file has no trace for the operation.
+    """
+    with open(path, 'r') as f:
+        text = f.read()
+
+    try:
+        data = json.loads(text)
+    except ValueError:
+        data = None
+
+    if isinstance(data, dict):
+        if operation not in data:
+            raise ValueError(f"Latency trace {path} has no entry for {operation}")
+        return [float(value) for value in data[operation]]
+    if isinstance(data, list):
+        return [float(value) for value in data]
+
+    samples = []
+    for line in text.splitlines():
+        value = line.split(',')[0].strip()
+        try:
+            samples.append(float(value))
+        except ValueError:
+            continue  # Header or blank line
+    return samples
+
+def parse_latency(spec, rng=None, operation=None, default=None):
+    """
+    Build a latency distribution from a short text spec.
+
+    Specs:
+        'zero'                    no delay
+        'fixed:SECONDS'           always SECONDS
+        'uniform:LOW,HIGH'        uniform between LOW and HIGH
+        'normal:MEAN,STDDEV'      normal, clipped at zero
+        'replay:PATH'             recorded trace, see load_trace
+        'default' or None         the default distribution
+
+    Args:
+        spec (str): The spec.
+        rng (random.Random): Source of random draws, for seeded runs.
+        operation (str): Operation name, for traces keyed by operation.
+        default: Distribution returned for 'default' or None.
+
+    Returns:
+        The distribution; call sample() for a delay in seconds.
+
+    Raises:
+        ValueError: If the spec is malformed.
+    """
+    if spec is None or spec == 'default':
+        return default if default is not None else FixedLatency(0)
+
+    kind, _, args = spec.partition(':')
+    kind = kind.strip().lower()
+    try:
+        if kind == 'zero':
+            return FixedLatency(0)
+        if kind == 'replay':
+            return ReplayLatency(load_trace(args.strip(), operation))
+
+        values = [float(value) for value in args.split(',')] if args else []
+        if kind == 'fixed' and len(values) == 1:
+            return FixedLatency(values[0])
+        if kind == 'uniform' and len(values) == 2:
+            return UniformLatency(values[0], values[1], rng)
+        if kind == 'normal' and len(values) == 2:
+            return NormalLatency(values[0], values[1], rng)
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"Invalid latency spec {spec!r}: {e}")
+
+    raise ValueError(f"Invalid latency spec {spec!r}. Use zero, fixed:S, uniform:LO,HI, "
+                     f"normal:MEAN,SD or replay:PATH.")
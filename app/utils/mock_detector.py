@@ -0,0 +1,241 @@
+import hashlib
+import random
+import time
+import zlib
+from datetime import datetime
+import numpy as np
+from app.utils.latency import UniformLatency, parse_latency
+from app.utils.species import get_species_kb
+
+class MockWeedDetector:
+    """
+    Simulated weed detector for the demo server (run.py).
+
+    Returns random but plausible detection results, after a simulated
+    model latency, without loading a model.
+    """
+    
+    # Simulated delay of each operation unless configured otherwise, in seconds
+    DEFAULT_LATENCY = {
+        'detect': (0.05, 0.2),
+        'document': (1.0, 2.0),
+        'growth_stage': (0.8, 1.8)
+    }
+    
+    def __init__(self, seed=None, latency='default'):
+        """
+        Args:
+            seed (int): Makes results repeatable: the same upload always gets
+                the same result, and latencies follow the same sequence.
+                None gives different random results every time.
+            latency (str or dict): Simulated latency spec (see
+                parse_latency) for every operation, or a dict of specs by
+                operation ('detect', 'document', 'growth_stage'). 'zero'
+                turns delays off, for load testing the serving layer alone.
+        """
+        self.seed = seed
+        
+        # One shared, seeded source for latency draws
+        self.latency = _latency_table(self.DEFAULT_LATENCY, latency, random.Random(seed))
+        
+        # Using YOLOv12 as our model version - the latest and most powerful version
+        self.model_version = "YOLOv12"
+        self.confidence_threshold = 0.25  # Lower threshold possible due to higher accuracy
+        self.classes = [
+            "Dandelion", "Crabgrass", "Thistle", "Clover", "Chickweed",
+            "Bindweed", "Nutsedge", "Purslane", "Plantain", "Poison Ivy",
+            "Bermudagrass", "Spurge", "Henbit", "Dollarweed", "Oxalis"  # Added additional species
+        ]
+        # Species descriptions and remedies, shared with the real detector
+        self.species = get_species_kb()
+        
+        # New YOLOv12 features
+        self.neural_arch = "TransformerS-Vision" 
+        self.resolution = 1280  # Higher resolution for better detection
+        self.fps = 120  # Frames per second for real-time processing
+        self.mAP = 99.8  # Mean Average Precision
+        self.supported_hardware = ["CPU", "CUDA", "TPU", "NPU", "Apple Neural Engine"]
+        self.edge_optimized = True
+        self.zero_shot_capable = True
+        self.few_shot_learning = True
+    
+    def rng_for(self, operation, data):
+        """
+        Return the random source for one simulated result.
+        
+        With a seed it is derived from the upload's content, so results
+        don't depend on the order concurrent requests arrive in.
+        """
+        if self.seed is None:
+            return random.Random()
+        return random.Random(f"{self.seed}:{operation}:{hashlib.sha256(data).hexdigest()}")
+    
+    def simulate_latency(self, operation):
+        """Sleep for one draw of the operation's latency and return it in seconds."""
+        return _sleep(self.latency[operation])
+    
+    def detect(self, image_path, rng=None):
+        """Mock YOLO detection that returns simulated detection results"""
+        # In a real implementation, we would run the image through YOLO here
+        # import ultralytics
+        # model = ultralytics.YOLO('yolov12.pt')
+        # results = model(image_path)
+        
+        rng = rng or random.Random()
+        detected_weeds = []
+        # Generate random detections for demo purposes
+        num_detections = rng.randint(2, 5)  # More reliable detections
+        detected_classes = rng.sample(self.classes, num_detections)
+        
+        # Simulate processing time - much faster with YOLOv12
+        inference_time = self.simulate_latency('detect')
+        
+        for i, weed_class in enumerate(detected_classes):
+            confidence = rng.uniform(0.85, 0.995)  # Higher confidence with latest model
+            x = rng.randint(50, 400)
+            y = rng.randint(50, 400)
+            w = rng.randint(50, 200)
+            h = rng.randint(50, 200)
+            
+            weed_info = self.species.get(weed_class) or {}
+            
+            # New: Add growth stage detection and health estimation
+            growth_stages = ["Seedling", "Early Growth", "Mature", "Flowering", "Seeding"]
+            health_status = ["Healthy", "Stressed", "Diseased"]
+            
+            detection = {
+                'id': i + 1,
+                'weed_type': weed_class,
+                'confidence': confidence,
+                'bbox': [x, y, x+w, y+h],  # [x1, y1, x2, y2] format
+                'scientific_name': weed_info.get('scientific_name', ''),
+                'growth_pattern': weed_info.get('growth_pattern', ''),
+                'habitat': weed_info.get('habitat', ''),
+                'growth_stage': rng.choice(growth_stages),
+                'health_status': rng.choice(health_status),
+                'estimated_age_days': rng.randint(5, 60),
+                'density_score': round(rng.uniform(0.1, 1.0), 2),
+                'size_cm': round(rng.uniform(5, 50), 1),
+                'remedy_id': self.species.remedy_id(weed_class),
+                'remedy': self.species.remedy(weed_class)
+            }
+            detected_weeds.append(detection)
+        
+        # Add environmental conditions analysis (new feature in YOLOv12)
+        environmental_analysis = {
+            "soil_moisture": rng.choice(["Low", "Medium", "High"]),
+            "light_conditions": rng.choice(["Shaded", "Partial Sun", "Full Sun"]),
+            "estimated_soil_compaction": rng.choice(["Low", "Medium", "High"]),
+            "competition_factor": round(rng.uniform(0.1, 1.0), 2),
+            "recommended_treatment_timing": rng.choice(["Morning", "Afternoon", "Evening"])
+        }
+        
+        return {
+            'model': self.model_version,
+            'architecture': self.neural_arch,
+            'inference_time': f"{inference_time:.3f}s",
+            'detections': detected_weeds,
+            'image_dimensions': [self.resolution, self.resolution],
+            'confidence_threshold': self.confidence_threshold,
+            'date': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            'environmental_analysis': environmental_analysis,
+            'real_time_capable': True,
+            'model_info': "YOLOv12 model with TransformerS-Vision architecture trained on 150,000+ weed images across various agricultural environments with 99.8% mAP50-95"
+        }
+
+class MockBoxes:
+    """Boxes of one result, shaped like ultralytics' Boxes."""
+
+    def __init__(self, xyxy, conf, cls):
+        self.xyxy = xyxy
+        self.conf = conf
+        self.cls = cls
+
+    def cpu(self):
+        return self
+
+    def numpy(self):
+        return self
+
+    def __len__(self):
+        return len(self.conf)
+
+class MockResult:
+    """Detection result for one image."""
+
+    def __init__(self, boxes, names):
+        self.boxes = boxes
+        self.names = names
+
+class MockYOLO:
+    """
+    A stand-in for the ultralytics YOLO model.
+
+    Callable like ultralytics.YOLO, it returns random boxes in the same
+    shape as ultralytics results after a simulated inference latency, so
+    WeedDetector(model=MockYOLO()) runs everything after inference exactly
+    as it does with the real model, without torch or downloaded weights.
+    Used by app.py when DETECTION_MODEL is 'mock' and by the benchmarks.
+    """
+
+    names = {0: 'plant', 1: 'weed', 2: 'grass'}
+
+    # Simulated inference time per call unless configured otherwise, in seconds
+    DEFAULT_LATENCY = {'detect': (0.05, 0.2)}
+
+    # Identifies mock results in result cache keys
+    model_version = 'mock'
+
+    def __init__(self, boxes_per_image=None, seed=None, latency='default'):
+        """
+        Args:
+            boxes_per_image (int): Boxes returned for every image; None
+                returns between 2 and 5.
+            seed (int): Makes results repeatable: the same image always gets
+                the same boxes. None gives different boxes every call.
+            latency (str or dict): Simulated latency spec per call (see
+                parse_latency), or {'detect': spec}. 'zero' turns it off.
+        """
+        self.boxes_per_image = boxes_per_image
+        self.seed = seed
+        self.latency = _latency_table(self.DEFAULT_LATENCY, latency, random.Random(seed))
+
+    def __call__(self, source, conf=0.25, **kwargs):
+        images = source if isinstance(source, list) else [source]
+        _sleep(self.latency['detect'])
+        return [self._result(image, conf) for image in images]
+
+    def _result(self, image, conf):
+        height, width = image.shape[:2]
+        if self.seed is None:
+            rng = np.random.default_rng()
+        else:
+            # Seeded by a sample of the pixels, which is cheap even for large images
+            rng = np.random.default_rng((self.seed, height, width,
+                                         zlib.crc32(np.ascontiguousarray(image[::16, ::16]))))
+        n = self.boxes_per_image if self.boxes_per_image is not None else int(rng.integers(2, 6))
+
+        # Boxes between 2% and 20% of the image side, anywhere in the image
+        box_w = rng.uniform(0.02, 0.2, n) * width
+        box_h = rng.uniform(0.02, 0.2, n) * height
+        x1 = rng.uniform(0, 1, n) * (width - box_w)
+        y1 = rng.uniform(0, 1, n) * (height - box_h)
+        xyxy = np.stack([x1, y1, x1 + box_w, y1 + box_h], axis=1).astype(np.float32)
+
+        scores = rng.uniform(conf, 1.0, n).astype(np.float32)
+        classes = rng.integers(0, len(self.names), n).astype(np.float32)
+        return MockResult(MockBoxes(xyxy, scores, classes), self.names)
+
+def _latency_table(defaults, latency, rng):
+    # One distribution per operation, all drawing from the same seeded source
+    table = {}
+    for operation, (low, high) in defaults.items():
+        spec = latency.get(operation, 'default') if isinstance(latency, dict) else latency
+        table[operation] = parse_latency(spec, rng, operation, default=UniformLatency(low, high, rng))
+    return table
+
+def _sleep(distribution):
+    seconds = distribution.sample()
+    if seconds > 0:
+        time.sleep(seconds)
+    return seconds
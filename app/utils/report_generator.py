@@ -1,78 +1,27 @@
-import os
 import json
+import hashlib
 from datetime import datetime
+from functools import lru_cache
+from itertools import starmap
+from operator import itemgetter
+from html import escape
+from app.utils.species import get_species_kb
 
-def generate_report(analysis_results):
-    """
-    Generate a detailed report based on document analysis results.
-    
-    Args:
-        analysis_results (dict): Results from document analysis.
-        
-    Returns:
-        str: Path to the generated report file.
-    """
-    try:
-        # Create reports directory if it doesn't exist
-        reports_dir = 'app/static/reports'
-        os.makedirs(reports_dir, exist_ok=True)
-        
-        # Generate a unique filename for the report
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        report_filename = f"weed_report_{timestamp}.html"
-        report_path = os.path.join(reports_dir, report_filename)
-        
-        # Extract analysis data
-        if 'analysis' in analysis_results:
-            analysis = analysis_results['analysis']
-        else:
-            analysis = analysis_results  # If analysis is directly passed
-            
-        # Generate HTML report
-        html_content = _generate_html_report(analysis, timestamp)
-        
-        # Write the HTML report to file
-        with open(report_path, 'w') as f:
-            f.write(html_content)
-        
-        return report_path
-        
-    except Exception as e:
-        print(f"Error generating report: {e}")
-        return None
-
-def _generate_html_report(analysis, timestamp):
-    """
-    Generate HTML content for the weed analysis report.
-    
-    Args:
-        analysis (dict): Analysis data.
-        timestamp (str): Timestamp for the report.
-        
-    Returns:
-        str: HTML content for the report.
-    """
-    # Format the date for display
-    date_str = datetime.now().strftime('%B %d, %Y')
-    
-    # Extract data from analysis
-    weed_mentions = analysis.get('weed_mentions', {})
-    growth_stages = analysis.get('growth_stages', {})
-    treatments = analysis.get('treatments', {})
-    locations = analysis.get('locations', [])
-    dates = analysis.get('dates', [])
-    summary = analysis.get('summary', 'No summary available.')
-    
-    # Create the HTML content
-    html = f"""
+# Sections of the report that don't depend on the analysis, built once. A
+# render only formats the data-dependent rows between them, and every value
+# taken from the analysis or the knowledge base is HTML-escaped. Rows keyed
+# by vocabulary terms repeat across documents, so they are rendered once.
+_PAGE_START = """
     <!DOCTYPE html>
     <html lang="en">
     <head>
         <meta charset="UTF-8">
         <meta name="viewport" content="width=device-width, initial-scale=1.0">
-        <title>Weed Analysis Report | {date_str}</title>
+        <title>Weed Analysis Report | """
+
+_PAGE_HEADER = """</title>
         <style>
-            body {{
+            body {
                 font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
                 line-height: 1.6;
                 color: #333;
@@ -80,281 +29,122 @@ def _generate_html_report(analysis, timestamp):
                 margin: 0 auto;
                 padding: 20px;
                 background-color: #f5f5f5;
-            }}
-            .report-container {{
+            }
+            .report-container {
                 background-color: white;
                 border-radius: 10px;
                 box-shadow: 0 4px 6px rgba(0, 0, 0, 0.1);
                 padding: 30px;
                 margin-bottom: 20px;
-            }}
-            .header {{
+            }
+            .header {
                 border-bottom: 2px solid #4CAF50;
                 padding-bottom: 15px;
                 margin-bottom: 25px;
-            }}
-            h1 {{
+            }
+            h1 {
                 color: #2E7D32;
                 margin: 0;
-            }}
-            h2 {{
+            }
+            h2 {
                 color: #388E3C;
                 margin-top: 30px;
                 margin-bottom: 15px;
                 padding-bottom: 5px;
                 border-bottom: 1px solid #ddd;
-            }}
-            .date {{
+            }
+            .date {
                 color: #666;
                 font-style: italic;
-            }}
-            .summary {{
+            }
+            .summary {
                 background-color: #F1F8E9;
                 padding: 15px;
                 border-radius: 5px;
                 border-left: 4px solid #8BC34A;
                 margin: 20px 0;
-            }}
-            table {{
+            }
+            table {
                 width: 100%;
                 border-collapse: collapse;
                 margin: 20px 0;
-            }}
-            th, td {{
+            }
+            th, td {
                 padding: 12px 15px;
                 text-align: left;
                 border-bottom: 1px solid #ddd;
-            }}
-            th {{
+            }
+            th {
                 background-color: #4CAF50;
                 color: white;
-            }}
-            tr:hover {{
+            }
+            tr:hover {
                 background-color: #f5f5f5;
-            }}
-            .chart-section {{
+            }
+            .chart-section {
                 margin: 30px 0;
-            }}
-            .chart-container {{
+            }
+            .chart-container {
                 height: 250px;
                 margin: 20px 0;
                 border: 1px solid #ddd;
                 border-radius: 5px;
                 padding: 10px;
                 background-color: white;
-            }}
-            .recommendations {{
+            }
+            .recommendations {
                 background-color: #E8F5E9;
                 padding: 20px;
                 border-radius: 5px;
                 margin: 20px 0;
-            }}
-            .footer {{
+            }
+            .footer {
                 margin-top: 40px;
                 text-align: center;
                 color: #666;
                 font-size: 0.9em;
-            }}
+            }
         </style>
     </head>
     <body>
         <div class="report-container">
             <div class="header">
                 <h1>Weed Analysis Report</h1>
-                <p class="date">Generated on {date_str}</p>
+                <p class="date">Generated on """
+
+_SUMMARY_START = """</p>
             </div>
             
             <div class="summary">
                 <h2>Executive Summary</h2>
-                <p>{summary}</p>
+                <p>"""
+
+_SUMMARY_END = """</p>
             </div>
             
             <h2>Detected Weed Species</h2>
     """
-    
-    if weed_mentions:
-        html += """
-            <table>
-                <thead>
-                    <tr>
-                        <th>Weed Type</th>
-                        <th>Frequency</th>
-                    </tr>
-                </thead>
-                <tbody>
-        """
-        
-        for weed, count in sorted(weed_mentions.items(), key=lambda x: x[1], reverse=True):
-            html += f"""
-                    <tr>
-                        <td>{weed}</td>
-                        <td>{count}</td>
-                    </tr>
-            """
-        
-        html += """
-                </tbody>
-            </table>
-        """
-    else:
-        html += "<p>No specific weed species detected in the document.</p>"
-    
-    html += """
-        <h2>Growth Stages</h2>
-    """
-    
-    if growth_stages:
-        html += """
-            <table>
-                <thead>
-                    <tr>
-                        <th>Growth Stage</th>
-                        <th>Frequency</th>
-                    </tr>
-                </thead>
-                <tbody>
-        """
-        
-        for stage, count in sorted(growth_stages.items(), key=lambda x: x[1], reverse=True):
-            html += f"""
-                    <tr>
-                        <td>{stage}</td>
-                        <td>{count}</td>
-                    </tr>
-            """
-        
-        html += """
-                </tbody>
-            </table>
-        """
-    else:
-        html += "<p>No growth stage information detected in the document.</p>"
-    
-    html += """
-        <h2>Treatment Methods</h2>
-    """
-    
-    if treatments:
-        html += """
-            <table>
-                <thead>
-                    <tr>
-                        <th>Treatment Method</th>
-                        <th>Frequency</th>
-                    </tr>
-                </thead>
-                <tbody>
-        """
-        
-        for treatment, count in sorted(treatments.items(), key=lambda x: x[1], reverse=True):
-            html += f"""
-                    <tr>
-                        <td>{treatment}</td>
-                        <td>{count}</td>
-                    </tr>
-            """
-        
-        html += """
-                </tbody>
-            </table>
-        """
-    else:
-        html += "<p>No treatment methods detected in the document.</p>"
-    
-    html += """
-        <h2>Locations and Dates</h2>
-    """
-    
-    if locations:
-        html += """
-            <table>
-                <thead>
-                    <tr>
-                        <th>Location Type</th>
-                        <th>Identifier</th>
-                    </tr>
-                </thead>
-                <tbody>
-        """
-        
-        for loc_type, identifier in locations:
-            html += f"""
-                    <tr>
-                        <td>{loc_type.capitalize()}</td>
-                        <td>{identifier}</td>
-                    </tr>
-            """
-        
-        html += """
+
+_TABLE_END = """
                 </tbody>
             </table>
         """
-    else:
-        html += "<p>No specific location information detected in the document.</p>"
-    
-    if dates:
-        html += """
+
+_DATES_START = """
             <h3>Relevant Dates</h3>
             <ul>
         """
-        
-        for date in dates:
-            html += f"<li>{date}</li>"
-        
-        html += """
+
+_DATES_END = """
             </ul>
         """
-    
-    # Add recommendations section based on detected weeds
-    html += """
+
+_RECOMMENDATIONS_START = """
         <div class="recommendations">
             <h2>Recommendations</h2>
     """
-    
-    if weed_mentions:
-        primary_weeds = sorted(weed_mentions.items(), key=lambda x: x[1], reverse=True)[:3]
-        html += "<ul>"
-        
-        for weed, _ in primary_weeds:
-            if weed == "Dandelion":
-                html += """
-                    <li><strong>Dandelion Control:</strong> Use a weeding tool to remove the entire root. For larger areas, 
-                    consider selective herbicides containing 2,4-D applied when plants are actively growing.</li>
-                """
-            elif weed == "Crabgrass":
-                html += """
-                    <li><strong>Crabgrass Management:</strong> Apply pre-emergent herbicides in early spring before soil 
-                    temperatures reach 55°F. For established plants, use post-emergent herbicides containing quinclorac.</li>
-                """
-            elif weed == "Thistle":
-                html += """
-                    <li><strong>Thistle Removal:</strong> Dig out the entire root system for small areas. For larger infestations, 
-                    use broadleaf herbicides containing clopyralid or 2,4-D when plants are actively growing.</li>
-                """
-            elif weed == "Chickweed":
-                html += """
-                    <li><strong>Chickweed Control:</strong> Hand-pull plants before they seed and apply mulch in garden areas. 
-                    Consider post-emergent herbicides containing dicamba for larger areas.</li>
-                """
-            elif weed == "Bindweed":
-                html += """
-                    <li><strong>Bindweed Management:</strong> Persistent removal of all above-ground growth to starve the roots. 
-                    Cover with landscape fabric in garden areas and apply herbicides containing dicamba for severe infestations.</li>
-                """
-            elif weed == "Nutsedge":
-                html += """
-                    <li><strong>Nutsedge Control:</strong> Improve drainage in affected areas. Hand-pull plants ensuring removal 
-                    of tubers. For severe cases, use herbicides containing halosulfuron.</li>
-                """
-            else:
-                html += f"""
-                    <li><strong>{weed} Management:</strong> Implement integrated weed management practices including proper 
-                    identification, manual removal, and appropriate herbicide selection based on the growth stage.</li>
-                """
-        
-        html += "</ul>"
-    else:
-        html += """
+
+_GENERAL_RECOMMENDATIONS = """
             <p>No specific weed species were identified in the document. For general weed management:</p>
             <ul>
                 <li>Maintain healthy soil with proper pH and adequate fertility</li>
@@ -363,17 +153,185 @@ def _generate_html_report(analysis, timestamp):
                 <li>Consider using pre-emergent herbicides in early spring for annual weed control</li>
             </ul>
         """
-    
-    html += """
+
+_FOOTER_START = """
         </div>
         
         <div class="footer">
             <p>This report was generated automatically by the Weed Detection Application.</p>
-            <p>Report ID: WD-{timestamp}</p>
+            <p>Report ID: WD-"""
+
+_PAGE_END = """</p>
         </div>
     </div>
     </body>
     </html>
-    """.format(timestamp=timestamp)
+    """
+
+def _heading(title):
+    return f"""
+        <h2>{title}</h2>
+    """
+
+def _table_start(*headers):
+    cells = ''.join(f"""
+                        <th>{header}</th>""" for header in headers)
+    return f"""
+            <table>
+                <thead>
+                    <tr>{cells}
+                    </tr>
+                </thead>
+                <tbody>
+        """
+
+_WEED_TABLE_START = _table_start('Weed Type', 'Scientific Name', 'Frequency')
+_GROWTH_STAGE_TABLE_START = _table_start('Growth Stage', 'Frequency')
+_TREATMENT_TABLE_START = _table_start('Treatment Method', 'Frequency')
+_LOCATION_TABLE_START = _table_start('Location Type', 'Identifier')
+
+_GROWTH_STAGES_HEADING = _heading('Growth Stages')
+_TREATMENTS_HEADING = _heading('Treatment Methods')
+_LOCATIONS_HEADING = _heading('Locations and Dates')
+
+def report_id(analysis):
+    """
+    Compute the content hash that names the report for an analysis.
+
+    Args:
+        analysis (dict): Analysis data.
+
+    Returns:
+        str: SHA-256 hex digest of the analysis in canonical JSON form.
+    """
+    canonical = json.dumps(analysis, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+def render_report(analysis, report_ref, generated_at=None):
+    """
+    Render the HTML report for an analysis without writing it to disk.
+    
+    Args:
+        analysis (dict): Analysis data.
+        report_ref (str): Identifier shown as the report ID.
+        generated_at (datetime): Date shown on the report; defaults to now.
+        
+    Returns:
+        str: HTML content for the report.
+    """
+    return _generate_html_report(analysis, report_ref, generated_at)
+
+def _generate_html_report(analysis, timestamp, generated_at=None):
+    """
+    Generate HTML content for the weed analysis report.
+    
+    Args:
+        analysis (dict): Analysis data.
+        timestamp (str): Identifier shown as the report ID.
+        generated_at (datetime): Date shown on the report; defaults to now.
+        
+    Returns:
+        str: HTML content for the report.
+    """
+    # Format the date for display
+    date_str = _date_string((generated_at or datetime.now()).date())
+    
+    # Extract data from analysis
+    weed_mentions = sorted(analysis.get('weed_mentions', {}).items(), key=itemgetter(1), reverse=True)
+    growth_stages = sorted(analysis.get('growth_stages', {}).items(), key=itemgetter(1), reverse=True)
+    treatments = sorted(analysis.get('treatments', {}).items(), key=itemgetter(1), reverse=True)
+    locations = analysis.get('locations', [])
+    dates = analysis.get('dates', [])
+    
+    parts = [_PAGE_START, date_str, _PAGE_HEADER, date_str, _SUMMARY_START,
+             escape(analysis.get('summary', 'No summary available.')), _SUMMARY_END]
     
-    return html 
\ No newline at end of file
+    if weed_mentions:
+        parts.append(_WEED_TABLE_START)
+        parts.extend(starmap(_weed_row, weed_mentions))
+        parts.append(_TABLE_END)
+    else:
+        parts.append("<p>No specific weed species detected in the document.</p>")
+    
+    parts.append(_GROWTH_STAGES_HEADING)
+    _append_table(parts, _GROWTH_STAGE_TABLE_START, growth_stages, _count_row,
+                  "<p>No growth stage information detected in the document.</p>")
+    parts.append(_TREATMENTS_HEADING)
+    _append_table(parts, _TREATMENT_TABLE_START, treatments, _count_row,
+                  "<p>No treatment methods detected in the document.</p>")
+    parts.append(_LOCATIONS_HEADING)
+    _append_table(parts, _LOCATION_TABLE_START, [(loc_type.capitalize(), identifier) for loc_type, identifier in locations],
+                  _row, "<p>No specific location information detected in the document.</p>")
+    
+    if dates:
+        parts.append(_DATES_START)
+        parts.extend(f"<li>{escape(str(date))}</li>" for date in dates)
+        parts.append(_DATES_END)
+    
+    # Recommendations for the three most mentioned weeds
+    parts.append(_RECOMMENDATIONS_START)
+    if weed_mentions:
+        parts.append("<ul>")
+        parts.extend(_recommendation(weed) for weed, _ in weed_mentions[:3])
+        parts.append("</ul>")
+    else:
+        parts.append(_GENERAL_RECOMMENDATIONS)
+    
+    parts.extend([_FOOTER_START, escape(str(timestamp)), _PAGE_END])
+    return ''.join(parts)
+
+def _append_table(parts, table_start, rows, render_row, empty_text):
+    """Add a two-column table of rows to parts, or empty_text if there are none."""
+    if not rows:
+        parts.append(empty_text)
+        return
+    parts.append(table_start)
+    parts.extend(starmap(render_row, rows))
+    parts.append(_TABLE_END)
+
+def _row(label, value):
+    """Return a two-column table row."""
+    return f"""
+                    <tr>
+                        <td>{escape(str(label))}</td>
+                        <td>{escape(str(value))}</td>
+                    </tr>
+            """
+
+@lru_cache(maxsize=1024)
+def _count_row(term, count):
+    """Return the table row for a vocabulary term and its frequency."""
+    return _row(term, count)
+
+@lru_cache(maxsize=1024)
+def _weed_row(weed, count):
+    """Return the weed table row, with the scientific name from the knowledge base."""
+    scientific_name = (get_species_kb().get(weed) or {}).get('scientific_name', '')
+    return f"""
+                    <tr>
+                        <td>{escape(weed)}</td>
+                        <td><em>{escape(scientific_name)}</em></td>
+                        <td>{count}</td>
+                    </tr>
+            """
+
+@lru_cache(maxsize=32)
+def _date_string(day):
+    """Return the date as shown on reports, e.g. 'March 05, 2024'."""
+    return escape(day.strftime('%B %d, %Y'))
+
+@lru_cache(maxsize=256)
+def _recommendation(weed):
+    """Return the recommendation list item for a weed; the text only depends on the species."""
+    species = get_species_kb()
+    name = escape(weed)
+    if species.get(weed):
+        remedy = species.remedy(weed)
+        return f"""
+                    <li><strong>{name} Control:</strong> {escape(remedy['organic'])} 
+                    {escape(remedy['chemical'])}</li>
+                """
+    return f"""
+                    <li><strong>{name} Management:</strong> Implement integrated weed management practices including proper 
+                    identification, manual removal, and appropriate herbicide selection based on the growth stage.</li>
+                """
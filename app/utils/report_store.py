@@ -0,0 +1,130 @@
+import json
+import os
+import re
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+from app.utils.report_generator import report_id
+
+# Report ids are SHA-256 hex digests
+REPORT_ID_PATTERN = re.compile(r'[0-9a-f]{64}')
+
+class ReportStore:
+    """
+    Persists report data as compact JSON and renders HTML on request.
+
+    Uploads only save the data a report is built from, named by its
+    content hash. HTML is rendered the first time a report is viewed and
+    kept in an in-memory LRU. A report's HTML is fixed by its id and
+    creation time, so the id serves as its ETag and the creation time as
+    its Last-Modified date.
+    """
+
+    def __init__(self, reports_dir, render, max_rendered=64):
+        """
+        Args:
+            reports_dir (str): Directory holding the JSON report data.
+            render (callable): Called as render(data, report_id, created_at)
+                to build the HTML for a report.
+            max_rendered (int): Number of rendered reports kept in memory.
+        """
+        self.reports_dir = reports_dir
+        self.max_rendered = max_rendered
+        self._render = render
+        self._rendered = OrderedDict()
+        self._lock = threading.Lock()
+
+        os.makedirs(reports_dir, exist_ok=True)
+
+    def save(self, data):
+        """
+        Store report data, reusing the stored copy of identical data.
+
+        Args:
+            data (dict): JSON-serializable data the report is rendered from.
+
+        Returns:
+            str: The report id.
+        """
+        rid = report_id(data)
+        path = self._path(rid)
+
+        if os.path.exists(path):
+            # Refresh it so the storage sweeper keeps reports still in use
+            os.utime(path)
+            return rid
+
+        record = {
+            'created_at': datetime.now(timezone.utc).replace(microsecond=0).isoformat(),
+            'data': data
+        }
+
+        # Write to a temporary file first so readers never see partial JSON
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(record, f, separators=(',', ':'), default=str)
+        os.replace(tmp_path, path)
+        return rid
+
+    def load(self, rid):
+        """
+        Read stored report data.
+
+        Args:
+            rid (str): Report id from save.
+
+        Returns:
+            dict: The saved data, or None if the report doesn't exist.
+        """
+        record = self._read(rid)
+        return record['data'] if record is not None else None
+
+    def render(self, rid):
+        """
+        Return the HTML for a report, rendering it on first use.
+
+        Args:
+            rid (str): Report id from save.
+
+        Returns:
+            tuple: (html, created_at datetime), or None if the report
+                doesn't exist or has been swept.
+        """
+        if not REPORT_ID_PATTERN.fullmatch(rid) or not os.path.exists(self._path(rid)):
+            with self._lock:
+                self._rendered.pop(rid, None)
+            return None
+
+        with self._lock:
+            if rid in self._rendered:
+                self._rendered.move_to_end(rid)
+                return self._rendered[rid]
+
+        record = self._read(rid)
+        if record is None:
+            return None
+
+        created_at = datetime.fromisoformat(record['created_at'])
+        rendered = (self._render(record['data'], rid, created_at), created_at)
+
+        with self._lock:
+            self._rendered[rid] = rendered
+            while len(self._rendered) > self.max_rendered:
+                self._rendered.popitem(last=False)
+        return rendered
+
+    def _path(self, rid):
+        return os.path.join(self.reports_dir, f"{rid}.json")
+
+    def _read(self, rid):
+        if not REPORT_ID_PATTERN.fullmatch(rid):
+            return None
+
+        try:
+            with open(self._path(rid), 'r') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"Error reading report {rid}: {e}")
+            return None
@@ -0,0 +1,111 @@
+from app.utils.species import get_species_kb
+
+# Detection fields that describe the species rather than the individual box
+SPECIES_FIELDS = ('scientific_name', 'growth_pattern', 'habitat', 'remedy', 'remedy_id')
+
+def parse_response_options(args):
+    """
+    Read the response shape options from request query parameters.
+
+    ?verbose=0 selects the compact schema. ?fields=a,b limits detections to
+    the listed fields.
+
+    Args:
+        args (dict): The request's query parameters.
+
+    Returns:
+        tuple: (verbose, fields), where fields is None for all fields.
+    """
+    verbose = args.get('verbose', '1').lower() not in ('0', 'false', 'no')
+    fields = args.get('fields')
+    if fields is not None:
+        fields = [field.strip() for field in fields.split(',') if field.strip()]
+    return verbose, fields
+
+def shape_results(results, verbose=True, fields=None):
+    """
+    Apply the response options to detection results.
+
+    The verbose schema is the detector's output, optionally limited to the
+    requested fields. The compact schema is built by compact_results.
+    Results without a detections list, including errors, are returned
+    unchanged.
+
+    Args:
+        results (dict): Detection or growth stage results.
+        verbose (bool): Keep the verbose schema.
+        fields (list): Detection fields to keep; None keeps all.
+
+    Returns:
+        dict: The shaped results. The input is not modified.
+    """
+    if not isinstance(results, dict) or 'error' in results:
+        return results
+
+    detections = results.get('detections')
+    if isinstance(detections, dict):
+        # Growth stage results nest the detection results under 'detections'
+        return {**results, 'detections': shape_results(detections, verbose, fields)}
+    if not isinstance(detections, list):
+        return results
+
+    if not verbose:
+        return compact_results(results, fields)
+    if fields is None:
+        return results
+    return {**results, 'detections': [
+        {key: value for key, value in detection.items() if key in fields}
+        for detection in detections
+    ]}
+
+def compact_results(results, fields=None):
+    """
+    Convert detection results to the compact schema.
+
+    Detections become parallel arrays, one per field, so field names are
+    not repeated for every box. Species details appear once each in a
+    'species' table that the 'species' array indexes into. Remedy text is
+    left out; clients resolve remedy_id through GET /species.
+
+    Args:
+        results (dict): Detection results with a detections list.
+        fields (list): Per-box fields to keep; None keeps all.
+
+    Returns:
+        dict: The results in the compact schema.
+    """
+    knowledge_base = get_species_kb()
+    detections = results['detections']
+
+    # One array per per-box field, in first-seen order
+    columns = {}
+    for detection in detections:
+        for key in detection:
+            if key in SPECIES_FIELDS or key == 'weed_type' or key in columns:
+                continue
+            if fields is None or key in fields:
+                columns[key] = []
+
+    table = []
+    table_index = {}
+    species_column = []
+    for detection in detections:
+        weed_type = detection.get('weed_type')
+        if weed_type not in table_index:
+            known = knowledge_base.get(weed_type) if weed_type else None
+            table_index[weed_type] = len(table)
+            table.append({
+                'name': weed_type,
+                'scientific_name': (known or detection).get('scientific_name', ''),
+                'remedy_id': knowledge_base.remedy_id(weed_type or '')
+            })
+        species_column.append(table_index[weed_type])
+
+        for key, values in columns.items():
+            values.append(detection.get(key))
+
+    compact = {key: value for key, value in results.items() if key not in ('detections', 'remedies')}
+    compact['format'] = 'compact'
+    compact['detections'] = {'species': species_column, **columns}
+    compact['species'] = table
+    return compact
@@ -0,0 +1,115 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+class ResultCache:
+    """
+    Cache of inference results keyed by the content of the uploaded image.
+
+    Entries live in an in-memory LRU. When cache_dir is set, every entry is
+    also written there as JSON so results survive restarts and are shared by
+    worker processes; disk hits are promoted back into memory.
+    """
+
+    def __init__(self, max_entries=256, cache_dir=None):
+        """
+        Args:
+            max_entries (int): Maximum number of entries kept in memory.
+            cache_dir (str): Optional directory for the on-disk tier.
+        """
+        self.max_entries = max_entries
+        self.cache_dir = cache_dir
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    @staticmethod
+    def make_key(data, model_version, confidence_threshold, task='detect'):
+        """
+        Build a cache key for an uploaded file.
+
+        Args:
+            data (bytes): Raw bytes of the uploaded file.
+            model_version (str): Identifier of the model producing results.
+            confidence_threshold (float): Detection confidence threshold.
+            task (str): Name of the operation, so different endpoints don't
+                share entries for the same image.
+
+        Returns:
+            str: Hex digest identifying the result.
+        """
+        content_hash = hashlib.sha256(data).hexdigest()
+        key = f"{task}|{model_version}|{confidence_threshold}|{content_hash}"
+        return hashlib.sha256(key.encode('utf-8')).hexdigest()
+
+    def get(self, key):
+        """
+        Look up a cached result.
+
+        Args:
+            key (str): Key from make_key.
+
+        Returns:
+            dict: The cached result, or None on a miss.
+        """
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+
+        value = self._read_disk(key)
+        if value is not None:
+            self._remember(key, value)
+        return value
+
+    def set(self, key, value):
+        """
+        Store a result in memory and, if enabled, on disk.
+
+        Args:
+            key (str): Key from make_key.
+            value (dict): JSON-serializable result.
+        """
+        self._remember(key, value)
+        self._write_disk(key, value)
+
+    def _remember(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _disk_path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def _read_disk(self, key):
+        if not self.cache_dir:
+            return None
+
+        try:
+            with open(self._disk_path(key), 'r') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"Error reading result cache entry: {e}")
+            return None
+
+    def _write_disk(self, key, value):
+        if not self.cache_dir:
+            return
+
+        try:
+            # Write to a temporary file first so readers never see partial JSON
+            path = self._disk_path(key)
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(value, f)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            print(f"Error writing result cache entry: {e}")
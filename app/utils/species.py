@@ -0,0 +1,107 @@
+import json
+import os
+
+# Species knowledge base shipped with the application
+DEFAULT_SPECIES_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'species.json')
+
+class SpeciesKnowledgeBase:
+    """
+    Weed species descriptions and remedies, indexed for lookup.
+
+    Species can be looked up case-insensitively by common or scientific
+    name. Remedies are stored once under a remedy id that species refer
+    to, so responses can carry the id and clients can fetch the text once.
+    Returned dicts are shared; callers must not modify them.
+    """
+
+    def __init__(self, species, remedies, default_remedy_id):
+        """
+        Args:
+            species (list): Species dicts with name, scientific_name,
+                growth_pattern, habitat and remedy_id.
+            remedies (dict): Remedy id -> {organic, chemical, prevention}.
+            default_remedy_id (str): Remedy used for unknown species.
+        """
+        self.species = list(species)
+        self.remedies = dict(remedies)
+        self.default_remedy_id = default_remedy_id
+
+        self._index = {}
+        for entry in self.species:
+            self._index[entry['name'].lower()] = entry
+            self._index.setdefault(entry['scientific_name'].lower(), entry)
+
+    @classmethod
+    def from_file(cls, path=DEFAULT_SPECIES_PATH):
+        """
+        Load a knowledge base from a JSON file.
+
+        Args:
+            path (str): Path to the species file.
+
+        Returns:
+            SpeciesKnowledgeBase: The loaded knowledge base.
+        """
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        return cls(data['species'], data['remedies'], data['default_remedy_id'])
+
+    @property
+    def names(self):
+        """list: Common names of all species, in file order."""
+        return [entry['name'] for entry in self.species]
+
+    def get(self, name):
+        """
+        Look up a species by common or scientific name.
+
+        Args:
+            name (str): Common or scientific name, in any case.
+
+        Returns:
+            dict: The species entry, or None if it is unknown.
+        """
+        return self._index.get(name.lower())
+
+    def remedy_id(self, name):
+        """
+        Return the remedy id for a species, or the default for unknown ones.
+
+        Args:
+            name (str): Common or scientific name.
+
+        Returns:
+            str: The remedy id.
+        """
+        entry = self.get(name)
+        return entry['remedy_id'] if entry is not None else self.default_remedy_id
+
+    def remedy(self, name):
+        """
+        Return the remedy for a species, or the default for unknown ones.
+
+        Args:
+            name (str): Common or scientific name.
+
+        Returns:
+            dict: Remedy recommendations.
+        """
+        return self.remedies[self.remedy_id(name)]
+
+    def scientific_names(self):
+        """
+        Map each scientific name to its species' common name.
+
+        Returns:
+            dict: Scientific name -> common name.
+        """
+        return {entry['scientific_name']: entry['name'] for entry in self.species}
+
+_knowledge_base = None
+
+def get_species_kb():
+    """Return the shipped species knowledge base, loaded on first use."""
+    global _knowledge_base
+    if _knowledge_base is None:
+        _knowledge_base = SpeciesKnowledgeBase.from_file()
+    return _knowledge_base
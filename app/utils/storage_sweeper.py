@@ -0,0 +1,118 @@
+import fnmatch
+import os
+import threading
+import time
+
+class StorageSweeper:
+    """
+    Background eviction of generated files by age and total size.
+
+    Every interval seconds the sweeper deletes files older than max_age
+    from the watched directories, then deletes the least recently modified
+    files until their combined size is at most max_bytes. Generated reports
+    are refreshed when they are reused, so files still being served stay.
+    
+    Only files matching a directory's name patterns are considered, so
+    files shipped alongside generated output (such as the demo assets in
+    app/static) are never removed.
+    """
+
+    def __init__(self, directories, max_age=None, max_bytes=None, interval=600):
+        """
+        Args:
+            directories (dict): Directory -> list of glob patterns matching
+                the generated files in it, or None when every file in the
+                directory is generated. The size limit applies to all of
+                them together.
+            max_age (float): Seconds since last modification after which a
+                file is removed; None disables the age limit.
+            max_bytes (int): Total size the files may occupy; None disables
+                the size limit.
+            interval (float): Seconds between sweeps.
+        """
+        self.directories = dict(directories)
+        self.max_age = max_age
+        self.max_bytes = max_bytes
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Start sweeping in a daemon thread."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='storage-sweeper', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the background thread."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def sweep(self):
+        """
+        Apply the age and size limits once.
+
+        Returns:
+            int: Number of files removed.
+        """
+        files = []
+        for directory, patterns in self.directories.items():
+            try:
+                entries = list(os.scandir(directory))
+            except FileNotFoundError:
+                continue
+            for entry in entries:
+                # Skip dotfiles such as .gitkeep and in-progress .tmp writes
+                if entry.name.startswith('.') or entry.name.endswith('.tmp'):
+                    continue
+                if patterns is not None and not any(fnmatch.fnmatch(entry.name, pattern)
+                                                    for pattern in patterns):
+                    continue
+                try:
+                    if entry.is_file():
+                        stat = entry.stat()
+                        files.append((stat.st_mtime, stat.st_size, entry.path))
+                except FileNotFoundError:
+                    continue
+
+        # Oldest first
+        files.sort()
+        removed = 0
+
+        if self.max_age is not None:
+            cutoff = time.time() - self.max_age
+            while files and files[0][0] < cutoff:
+                _, _, path = files.pop(0)
+                removed += _remove(path)
+
+        if self.max_bytes is not None:
+            total = sum(size for _, size, _ in files)
+            while files and total > self.max_bytes:
+                _, size, path = files.pop(0)
+                removed += _remove(path)
+                total -= size
+
+        return removed
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.sweep()
+            except Exception as e:
+                print(f"Error sweeping storage: {e}")
+            self._stop.wait(self.interval)
+
+def _remove(path):
+    try:
+        os.remove(path)
+        return 1
+    except FileNotFoundError:
+        return 0
+    except Exception as e:
+        print(f"Error removing {path}: {e}")
+        return 0
@@ -0,0 +1,177 @@
+import os
+import numpy as np
+from app.utils.image_frame import ImageFrame
+
+class ArrayTileReader:
+    """Tile reader over an image that is already in memory."""
+
+    def __init__(self, image):
+        self.image = image
+        self.height, self.width = image.shape[:2]
+
+    def read(self, x, y, width, height):
+        return self.image[y:y + height, x:x + width]
+
+    def close(self):
+        pass
+
+class NumpyTileReader(ArrayTileReader):
+    """
+    Tile reader over a memory-mapped .npy array of shape (H, W, 3), BGR.
+
+    Only the pages backing the requested window are read from disk.
+    """
+
+    def __init__(self, path):
+        super().__init__(np.load(path, mmap_mode='r'))
+
+    def read(self, x, y, width, height):
+        # Copy the window out so the model never holds a view of the mapping
+        return np.ascontiguousarray(super().read(x, y, width, height))
+
+class RasterioTileReader:
+    """
+    Windowed reader for GeoTIFF orthomosaics, backed by rasterio.
+
+    Rasters that aren't 8-bit are scaled to 0-255 with one range for the
+    whole raster, so a plant looks the same in every tile and on both sides
+    of a seam. The range is the 0.5th to 99.5th percentile of a decimated
+    read, which uses the raster's overviews when it has them, ignoring
+    nodata pixels.
+    """
+
+    # Longest side of the decimated read used to pick the intensity range
+    SAMPLE_SIZE = 1024
+
+    def __init__(self, path):
+        import rasterio
+
+        self._dataset = rasterio.open(path)
+        self.width = self._dataset.width
+        self.height = self._dataset.height
+        self._low, self._scale = None, None
+        if self._dataset.dtypes[0] != 'uint8':
+            self._low, self._scale = self._intensity_range()
+
+    def read(self, x, y, width, height):
+        from rasterio.windows import Window
+
+        # Bands 1-3 are RGB in drone orthomosaics; the model expects BGR
+        bands = self._dataset.read([1, 2, 3], window=Window(x, y, width, height))
+        tile = np.transpose(bands, (1, 2, 0))[..., ::-1]
+        if self._scale is not None:
+            tile = np.clip((tile.astype(np.float32) - self._low) * self._scale, 0, 255)
+        return np.ascontiguousarray(tile, dtype=np.uint8)
+
+    def _intensity_range(self):
+        factor = max(1, max(self.width, self.height) / self.SAMPLE_SIZE)
+        sample = self._dataset.read([1, 2, 3], masked=True,
+                                    out_shape=(3, max(1, round(self.height / factor)),
+                                               max(1, round(self.width / factor))))
+        values = sample.compressed()
+        if values.size == 0:
+            return 0.0, 0.0
+        low, high = np.percentile(values, [0.5, 99.5])
+        return float(low), (255.0 / (high - low) if high > low else 0.0)
+
+    def close(self):
+        self._dataset.close()
+
+def open_tile_reader(source):
+    """
+    Open a reader that returns image windows without loading the whole image.
+
+    GeoTIFFs are read through rasterio windows when it is installed, and .npy
+    arrays through a memory map. Other formats have no windowed decoder, so
+    they are decoded in full.
+
+    Args:
+        source (str, numpy.ndarray or ImageFrame): The image to tile.
+
+    Returns:
+        A reader with width, height, read(x, y, width, height) and close().
+    """
+    if isinstance(source, ImageFrame):
+        return ArrayTileReader(source.image)
+    if isinstance(source, np.ndarray):
+        return ArrayTileReader(source)
+
+    ext = os.path.splitext(source)[1].lower()
+    if ext == '.npy':
+        return NumpyTileReader(source)
+
+    if ext in ('.tif', '.tiff'):
+        try:
+            return RasterioTileReader(source)
+        except ImportError:
+            print("rasterio is not installed; decoding the full image for tiling")
+
+    return ArrayTileReader(ImageFrame.from_path(source).image)
+
+def tile_grid(width, height, tile_size, overlap):
+    """
+    Compute overlapping tile windows covering an image.
+
+    Tiles in the last row and column are shifted back to end at the image
+    edge, so every tile is full size unless the image itself is smaller.
+
+    Args:
+        width (int): Image width.
+        height (int): Image height.
+        tile_size (int): Tile side length in pixels.
+        overlap (float): Fraction of a tile shared with its neighbour.
+
+    Returns:
+        list: (x, y, tile_width, tile_height) windows.
+    """
+    stride = max(1, int(tile_size * (1 - overlap)))
+
+    def starts(length):
+        if length <= tile_size:
+            return [0]
+        positions = list(range(0, length - tile_size, stride))
+        positions.append(length - tile_size)
+        return positions
+
+    return [(x, y, min(tile_size, width), min(tile_size, height))
+            for y in starts(height) for x in starts(width)]
+
+def non_max_suppression(boxes, scores, classes, iou_threshold=0.5):
+    """
+    Class-aware non-maximum suppression over boxes from all tiles.
+
+    Args:
+        boxes (numpy.ndarray): (N, 4) boxes as [x1, y1, x2, y2].
+        scores (numpy.ndarray): (N,) confidences.
+        classes (numpy.ndarray): (N,) class ids; only boxes of the same
+            class suppress each other.
+        iou_threshold (float): Overlap above which the weaker box is dropped.
+
+    Returns:
+        numpy.ndarray: Indices of the kept boxes, highest score first.
+    """
+    if len(boxes) == 0:
+        return np.empty(0, dtype=np.int64)
+
+    # Shift each class to its own region so boxes of different classes never overlap
+    offsets = classes.astype(np.float64)[:, None] * (boxes.max() + 1)
+    shifted = boxes.astype(np.float64) + offsets
+
+    x1, y1, x2, y2 = shifted.T
+    areas = (x2 - x1) * (y2 - y1)
+    order = np.argsort(-scores, kind='stable')
+
+    keep = []
+    while len(order):
+        best = order[0]
+        keep.append(best)
+        rest = order[1:]
+
+        w = np.clip(np.minimum(x2[best], x2[rest]) - np.maximum(x1[best], x1[rest]), 0, None)
+        h = np.clip(np.minimum(y2[best], y2[rest]) - np.maximum(y1[best], y1[rest]), 0, None)
+        inter = w * h
+        iou = inter / np.maximum(areas[best] + areas[rest] - inter, 1e-9)
+
+        order = rest[iou <= iou_threshold]
+
+    return np.array(keep, dtype=np.int64)
@@ -0,0 +1,169 @@
+from collections import Counter
+import numpy as np
+
+class Track:
+    """One plant followed across frames."""
+
+    def __init__(self, track_id, bbox, confidence, frame_index):
+        self.id = track_id
+        self.bbox = bbox
+        self.velocity = np.zeros(4)
+        self.confidence = confidence
+        self.weed_type = None
+        self.hits = 1
+        self.first_frame = frame_index
+        self.last_frame = frame_index
+
+    def predict(self, frame_index):
+        """Return the box expected at frame_index, assuming constant velocity."""
+        return self.bbox + self.velocity * (frame_index - self.last_frame)
+
+    def update(self, bbox, confidence, frame_index):
+        """Move the track to a newly matched box."""
+        gap = max(frame_index - self.last_frame, 1)
+        # Smooth the per-frame motion so one jittery box doesn't throw the prediction off
+        self.velocity = 0.5 * self.velocity + 0.5 * (bbox - self.bbox) / gap
+        self.bbox = bbox
+        self.confidence = confidence
+        self.hits += 1
+        self.last_frame = frame_index
+
+class IoUTracker:
+    """
+    Associates detections across the frames of a sequence, ByteTrack style.
+
+    Each frame, high-confidence boxes are matched to the tracks' predicted
+    boxes by IoU first, then low-confidence boxes are matched to the tracks
+    still left over. That keeps a plant's track alive through frames where
+    the model is briefly unsure of it, without letting uncertain boxes start
+    tracks of their own. Tracks not matched for max_age frames end.
+
+    The tracker only follows boxes; the caller sets Track.weed_type once,
+    when a track first appears, so each plant is classified once.
+    """
+
+    def __init__(self, iou_threshold=0.3, high_confidence=0.5, max_age=30, min_hits=1):
+        """
+        Args:
+            iou_threshold (float): Least IoU between a track's predicted box
+                and a detection for them to match.
+            high_confidence (float): Confidence from which a detection can
+                start a track and is matched in the first pass.
+            max_age (int): Frames a track survives without a match.
+            min_hits (int): Frames a track must be matched in to be counted.
+        """
+        self.iou_threshold = iou_threshold
+        self.high_confidence = high_confidence
+        self.max_age = max_age
+        self.min_hits = min_hits
+        self.reset()
+
+    def reset(self):
+        """Forget all tracks and counts, ready for a new sequence."""
+        self.tracks = []
+        self.frame_index = -1
+        self._next_id = 1
+        self._ended_counts = Counter()
+
+    def update(self, boxes_xyxy, confidences):
+        """
+        Match one frame's detections to the tracks.
+
+        Args:
+            boxes_xyxy (array-like): (N, 4) boxes as [x1, y1, x2, y2].
+            confidences (array-like): (N,) detection confidences.
+
+        Returns:
+            list: The Track of each box, in input order, or None for a
+                low-confidence box that matched no track.
+        """
+        self.frame_index += 1
+        boxes = np.asarray(boxes_xyxy, dtype=np.float64).reshape(-1, 4)
+        confidences = np.asarray(confidences, dtype=np.float64).reshape(-1)
+        assigned = [None] * len(boxes)
+
+        high = np.flatnonzero(confidences >= self.high_confidence)
+        low = np.flatnonzero(confidences < self.high_confidence)
+
+        unmatched_tracks = list(range(len(self.tracks)))
+        for candidates in (high, low):
+            matches, unmatched_tracks = self._match(boxes, candidates, unmatched_tracks)
+            for box_index, track_index in matches:
+                track = self.tracks[track_index]
+                track.update(boxes[box_index], float(confidences[box_index]), self.frame_index)
+                assigned[box_index] = track
+
+        # Unmatched confident boxes are new plants
+        for box_index in high:
+            if assigned[box_index] is None:
+                track = Track(self._next_id, boxes[box_index], float(confidences[box_index]),
+                              self.frame_index)
+                self._next_id += 1
+                self.tracks.append(track)
+                assigned[box_index] = track
+
+        self._end_stale_tracks()
+        return assigned
+
+    def counts(self):
+        """
+        Count the distinct plants seen so far in the sequence.
+
+        Returns:
+            dict: Weed type -> number of tracks matched in at least
+                min_hits frames, most common first.
+        """
+        counts = self._ended_counts.copy()
+        for track in self.tracks:
+            if track.weed_type and track.hits >= self.min_hits:
+                counts[track.weed_type] += 1
+        return dict(counts.most_common())
+
+    def _match(self, boxes, candidates, track_indices):
+        """Greedily pair boxes and tracks by IoU, best overlap first."""
+        if len(candidates) == 0 or not track_indices:
+            return [], track_indices
+
+        predicted = np.array([self.tracks[i].predict(self.frame_index) for i in track_indices])
+        iou = box_iou(boxes[candidates], predicted)
+
+        matches = []
+        used_boxes, used_tracks = set(), set()
+        pairs = np.argwhere(iou >= self.iou_threshold)
+        order = np.argsort(-iou[pairs[:, 0], pairs[:, 1]], kind='stable')
+        for row, col in pairs[order].tolist():
+            if row in used_boxes or col in used_tracks:
+                continue
+            used_boxes.add(row)
+            used_tracks.add(col)
+            matches.append((int(candidates[row]), track_indices[col]))
+
+        remaining = [index for col, index in enumerate(track_indices) if col not in used_tracks]
+        return matches, remaining
+
+    def _end_stale_tracks(self):
+        alive = []
+        for track in self.tracks:
+            if self.frame_index - track.last_frame <= self.max_age:
+                alive.append(track)
+            elif track.weed_type and track.hits >= self.min_hits:
+                self._ended_counts[track.weed_type] += 1
+        self.tracks = alive
+
+def box_iou(a, b):
+    """
+    Pairwise IoU between two sets of boxes.
+
+    Args:
+        a (numpy.ndarray): (N, 4) boxes as [x1, y1, x2, y2].
+        b (numpy.ndarray): (M, 4) boxes as [x1, y1, x2, y2].
+
+    Returns:
+        numpy.ndarray: (N, M) IoU matrix.
+    """
+    w = np.clip(np.minimum(a[:, None, 2], b[None, :, 2]) - np.maximum(a[:, None, 0], b[None, :, 0]), 0, None)
+    h = np.clip(np.minimum(a[:, None, 3], b[None, :, 3]) - np.maximum(a[:, None, 1], b[None, :, 1]), 0, None)
+    inter = w * h
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    return inter / np.maximum(area_a[:, None] + area_b[None, :] - inter, 1e-9)
@@ -0,0 +1,303 @@
+import queue
+import threading
+import time
+import cv2
+import numpy as np
+from app.utils.image_frame import ImageFrame
+
+# Marks the end of the decoded frames
+_END = object()
+
+class FrameReader:
+    """
+    Decodes frames from a video file or live stream in a background thread.
+
+    Decoding overlaps with detection, and decoded frames wait in a bounded
+    queue. For files the decoder pauses while the queue is full so no frame
+    is lost. Live sources (camera indexes and stream URLs) can't be paused,
+    so the oldest queued frame is dropped instead, which keeps latency
+    bounded when detection falls behind.
+    """
+
+    def __init__(self, source, max_queue=64, drop_when_full=None):
+        """
+        Args:
+            source (str or int): Video file path, stream URL or camera index.
+            max_queue (int): Decoded frames buffered ahead of detection.
+            drop_when_full (bool): Drop the oldest frame rather than wait
+                when the buffer is full. Defaults to True for live sources.
+        """
+        self.source = source
+        self.live = isinstance(source, int) or '://' in str(source)
+        self.drop_when_full = self.live if drop_when_full is None else drop_when_full
+        self.frames_read = 0
+        self.frames_dropped = 0
+        self.source_fps = None
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._stop = threading.Event()
+        self._capture = None
+        self._thread = None
+
+    def start(self):
+        """
+        Open the source and start decoding.
+
+        Returns:
+            FrameReader: self, for chaining.
+
+        Raises:
+            ValueError: If the source can't be opened.
+        """
+        self._capture = cv2.VideoCapture(self.source)
+        if not self._capture.isOpened():
+            self._capture.release()
+            raise ValueError(f"Could not open video source: {self.source}")
+
+        fps = self._capture.get(cv2.CAP_PROP_FPS)
+        self.source_fps = fps if fps and fps > 0 else None
+
+        self._thread = threading.Thread(target=self._run, name='frame-reader', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop decoding and release the source."""
+        self._stop.set()
+        # Unblock the decoder if it is waiting on a full queue
+        try:
+            while True:
+                self._queue.get_nowait()
+        except queue.Empty:
+            pass
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def pending(self):
+        """Return the number of decoded frames waiting to be processed."""
+        return self._queue.qsize()
+
+    def __iter__(self):
+        """
+        Yield decoded frames in order until the source ends or stop is called.
+
+        Yields:
+            tuple: (frame index, position in seconds, BGR image, time the
+                frame was decoded from time.perf_counter()).
+        """
+        while True:
+            item = self._queue.get()
+            if item is _END:
+                return
+            yield item
+
+    def _run(self):
+        try:
+            index = 0
+            while not self._stop.is_set():
+                ok, image = self._capture.read()
+                if not ok:
+                    break
+
+                position = self._capture.get(cv2.CAP_PROP_POS_MSEC) / 1000
+                if position <= 0 and self.source_fps:
+                    position = index / self.source_fps
+                item = (index, position, image, time.perf_counter())
+                index += 1
+                self.frames_read += 1
+
+                if self.drop_when_full:
+                    while True:
+                        try:
+                            self._queue.put_nowait(item)
+                            break
+                        except queue.Full:
+                            try:
+                                self._queue.get_nowait()
+                                self.frames_dropped += 1
+                            except queue.Empty:
+                                pass
+                else:
+                    while not self._stop.is_set():
+                        try:
+                            self._queue.put(item, timeout=0.1)
+                            break
+                        except queue.Full:
+                            continue
+        except Exception as e:
+            print(f"Error decoding video: {e}")
+        finally:
+            self._capture.release()
+            self._put_end()
+
+    def _put_end(self):
+        # Nobody reads the queue after stop, so don't wait for room then
+        while True:
+            try:
+                self._queue.put(_END, timeout=0.1)
+                return
+            except queue.Full:
+                if self._stop.is_set():
+                    return
+
+class FrameSampler:
+    """
+    Adaptive frame sampling that skips frames nearly identical to the last
+    one kept.
+
+    Each frame is reduced to a small grayscale thumbnail and compared with
+    the thumbnail of the last kept frame. A frame is kept when the mean
+    absolute difference exceeds change_threshold (in 0-255 gray levels) or
+    max_gap frames have been skipped in a row, so a static scene is still
+    checked regularly.
+    """
+
+    def __init__(self, change_threshold=4.0, max_gap=30, thumbnail_size=(64, 36)):
+        """
+        Args:
+            change_threshold (float): Mean gray-level change that counts as
+                a new view.
+            max_gap (int): Most consecutive frames skipped before one is
+                kept anyway.
+            thumbnail_size (tuple): (width, height) of the comparison
+                thumbnail.
+        """
+        self.change_threshold = change_threshold
+        self.max_gap = max_gap
+        self.thumbnail_size = thumbnail_size
+        self._last = None
+        self._gap = 0
+
+    def keep(self, image):
+        """
+        Decide whether to run detection on a frame.
+
+        Args:
+            image (numpy.ndarray): BGR frame.
+
+        Returns:
+            tuple: (keep, change), where change is the mean gray-level
+                difference from the last kept frame (None for the first).
+        """
+        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        thumbnail = cv2.resize(gray, self.thumbnail_size, interpolation=cv2.INTER_AREA)
+
+        if self._last is None:
+            change = None
+        else:
+            change = float(cv2.absdiff(thumbnail, self._last).mean())
+            if change < self.change_threshold and self._gap < self.max_gap:
+                self._gap += 1
+                return False, change
+
+        self._last = thumbnail
+        self._gap = 0
+        return True, change
+
+def process_stream(detector, source, batch_size=None, change_threshold=4.0, max_gap=30,
+                   max_queue=64, max_frames=None, tracker=None):
+    """
+    Run weed detection over a video file or live stream.
+
+    Frames are decoded in a background thread by FrameReader, thinned out
+    by FrameSampler, and detected in batches of up to batch_size. A batch
+    is sent as soon as it is full or no further decoded frame is waiting,
+    so batching never holds a frame back to wait for the next one.
+
+    Args:
+        detector (WeedDetector): The detector to run.
+        source (str or int): Video file path, stream URL or camera index.
+        batch_size (int): Frames per model call. Defaults to the
+            detector's batch_size.
+        change_threshold (float): See FrameSampler.
+        max_gap (int): See FrameSampler.
+        max_queue (int): See FrameReader.
+        max_frames (int): Stop after this many decoded frames; None reads
+            to the end of the source.
+        tracker (IoUTracker): Follow plants across frames; detections gain
+            a 'track_id' and the summary gains deduplicated 'plant_counts'.
+
+    Returns:
+        generator: One result dict per sampled frame, with 'frame', 'time',
+            'change', 'latency_ms' (from decode to result) and the
+            detection results. The last item is {'summary': {...}} with
+            frame counts, frames per second and latency percentiles.
+
+    Raises:
+        ValueError: If the source can't be opened.
+    """
+    # Open the source now so a bad source fails the call, not the first read
+    reader = FrameReader(source, max_queue).start()
+    return _detect_frames(detector, reader, FrameSampler(change_threshold, max_gap),
+                          batch_size or detector.batch_size, max_frames, tracker)
+
+def _detect_frames(detector, reader, sampler, batch_size, max_frames, tracker):
+    started = time.perf_counter()
+    latencies = []
+    sampled = 0
+    skipped = 0
+
+    def run_batch(batch):
+        results = detector.detect_batch([ImageFrame(image) for _, _, image, _, _ in batch],
+                                        batch_size=len(batch), annotate=False, tracker=tracker)
+        done = time.perf_counter()
+        for (index, position, _, decoded_at, change), result in zip(batch, results):
+            latency = (done - decoded_at) * 1000
+            latencies.append(latency)
+            yield {
+                'frame': index,
+                'time': round(position, 3),
+                'change': None if change is None else round(change, 2),
+                'latency_ms': round(latency, 1),
+                **result
+            }
+
+    try:
+        batch = []
+        for index, position, image, decoded_at in reader:
+            if max_frames is not None and index >= max_frames:
+                break
+
+            keep, change = sampler.keep(image)
+            if not keep:
+                skipped += 1
+                continue
+
+            sampled += 1
+            batch.append((index, position, image, decoded_at, change))
+            if len(batch) >= batch_size or reader.pending() == 0:
+                yield from run_batch(batch)
+                batch = []
+
+        if batch:
+            yield from run_batch(batch)
+    finally:
+        reader.stop()
+
+    elapsed = time.perf_counter() - started
+    summary = {
+        'frames_read': sampled + skipped,
+        'frames_sampled': sampled,
+        'frames_skipped': skipped,
+        'frames_dropped': reader.frames_dropped,
+        'source_fps': reader.source_fps,
+        'elapsed_s': round(elapsed, 3),
+        'read_fps': round((sampled + skipped) / elapsed, 1) if elapsed else None,
+        'detect_fps': round(sampled / elapsed, 1) if elapsed else None,
+        'latency_ms': _latency_stats(latencies)
+    }
+    if tracker is not None:
+        summary['plant_counts'] = tracker.counts()
+        summary['plants'] = sum(summary['plant_counts'].values())
+    yield {'summary': summary}
+
+def _latency_stats(latencies):
+    if not latencies:
+        return None
+    values = np.asarray(latencies)
+    return {
+        'mean': round(float(values.mean()), 1),
+        'p50': round(float(np.percentile(values, 50)), 1),
+        'p95': round(float(np.percentile(values, 95)), 1),
+        'max': round(float(values.max()), 1)
+    }
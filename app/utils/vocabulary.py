@@ -0,0 +1,155 @@
+import json
+import os
+import re
+from app.utils.species import get_species_kb
+
+# Vocabulary shipped with the application
+DEFAULT_VOCABULARY_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'vocabulary.json')
+
+class VocabularyMatcher:
+    """
+    Counts whole-word, case-insensitive mentions of many terms in one scan.
+
+    All terms are compiled into a single regex shaped like a prefix trie,
+    so each text position is tried against shared prefixes once rather than
+    against every term, and adding terms barely affects scan time. Where
+    terms overlap the longest match wins. Aliases, such as scientific
+    names, are counted towards the term they stand for.
+    """
+
+    def __init__(self, vocabulary, aliases=None):
+        """
+        Args:
+            vocabulary (dict): Category name -> list of terms.
+            aliases (dict): Category name -> {alias: term}, for other names
+                of terms in that category.
+        """
+        self.categories = {category: list(terms) for category, terms in vocabulary.items()}
+
+        # (category, term) -> lowercased spellings counted for it
+        self._spellings = {}
+        for category, terms in self.categories.items():
+            for term in terms:
+                self._spellings[(category, term)] = [term.lower()]
+        for category, names in (aliases or {}).items():
+            for alias, term in names.items():
+                if (category, term) in self._spellings:
+                    self._spellings[(category, term)].append(alias.lower())
+
+        # Lowercased spelling -> [(category, term as written in the vocabulary)]
+        self._lookup = {}
+        for (category, term), spellings in self._spellings.items():
+            for spelling in spellings:
+                self._lookup.setdefault(spelling, []).append((category, term))
+
+        pattern = _trie_pattern(self._lookup) if self._lookup else r'(?!)'
+        # Lookarounds rather than \b so terms may end in punctuation, as in 'spp.'
+        self._regex = re.compile(r'(?<!\w)' + pattern + r'(?!\w)', re.IGNORECASE)
+
+    @classmethod
+    def from_file(cls, path=DEFAULT_VOCABULARY_PATH):
+        """
+        Load a vocabulary from a JSON file of {category: [terms]}.
+
+        Args:
+            path (str): Path to the vocabulary file.
+
+        Returns:
+            VocabularyMatcher: Matcher for the file's terms.
+        """
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls(json.load(f))
+
+    def count(self, text):
+        """
+        Count mentions of every term in the text.
+
+        Args:
+            text (str): Text to scan.
+
+        Returns:
+            dict: Category -> {term: count}, with terms in vocabulary order
+                and only terms that occur.
+        """
+        return self.categorize(self.count_terms(text))
+
+    def count_terms(self, text):
+        """
+        Count raw matches in the text, keyed by lowercased term.
+
+        Totals from several pieces of text can be summed and passed to
+        categorize, which gives the same result as counting the joined text.
+
+        Args:
+            text (str): Text to scan.
+
+        Returns:
+            dict: Lowercased term -> count.
+        """
+        totals = {}
+        for match in self._regex.finditer(text):
+            key = match.group(0).lower()
+            totals[key] = totals.get(key, 0) + 1
+        return totals
+
+    def categorize(self, totals):
+        """
+        Group raw term counts by category.
+
+        Args:
+            totals (dict): Lowercased term -> count, from count_terms.
+
+        Returns:
+            dict: Category -> {term: count}, with terms in vocabulary order
+                and only terms that occur.
+        """
+        counts = {category: {} for category in self.categories}
+        for category, terms in self.categories.items():
+            for term in terms:
+                count = sum(totals.get(spelling, 0) for spelling in self._spellings[(category, term)])
+                if count > 0:
+                    counts[category][term] = count
+        return counts
+
+_default_matcher = None
+
+def get_default_matcher():
+    """
+    Return the matcher for the shipped vocabulary, compiled on first use.
+
+    Weed mentions are the species in the species knowledge base, matched
+    by common or scientific name; the other categories come from the
+    vocabulary file.
+    """
+    global _default_matcher
+    if _default_matcher is None:
+        with open(DEFAULT_VOCABULARY_PATH, 'r', encoding='utf-8') as f:
+            vocabulary = json.load(f)
+        species = get_species_kb()
+        _default_matcher = VocabularyMatcher(
+            {'weed_mentions': species.names, **vocabulary},
+            aliases={'weed_mentions': species.scientific_names()}
+        )
+    return _default_matcher
+
+def _trie_pattern(words):
+    trie = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[''] = {}
+
+    return _node_pattern(trie)
+
+def _node_pattern(node):
+    branches = [re.escape(char) + _node_pattern(child)
+                for char, child in sorted(node.items()) if char]
+    if not branches:
+        return ''
+
+    pattern = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+    if '' in node:
+        # A term ends here; the greedy optional tries longer terms first
+        pattern = '(?:' + pattern + ')?'
+    return pattern
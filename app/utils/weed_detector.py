@@ -1,94 +1,457 @@
 import os
-import cv2
+import threading
 import numpy as np
-from ultralytics import YOLO
-from PIL import Image
-import torch
+from app.utils.image_frame import ImageFrame, as_frame
+from app.utils.inference_backend import prepare_weights, set_thread_count, check_backend_parity
+from app.utils.tiling import open_tile_reader, tile_grid, non_max_suppression
+from app.utils.green_coverage import estimate_green_coverage
+from app.utils.species import get_species_kb
+from app.utils.annotation import draw_detections, encode_image, annotation_extension
+
+# Weed types the hue classifier assigns; each has an entry in the species knowledge base
+WEED_TYPES = [
+    "Dandelion",
+    "Crabgrass",
+    "Thistle",
+    "Chickweed",
+    "Bindweed",
+    "Nutsedge",
+    "Purslane",
+    "Pigweed",
+    "Wild Mustard",
+    "Foxtail"
+]
 
 class WeedDetector:
-    def __init__(self):
-        """Initialize the weed detector with YOLOv8 model."""
+    def __init__(self, batch_size=8, confidence_threshold=0.25, background_load=False,
+                 backend='torch', num_threads=None, coverage_method='full',
+                 coverage_stride=4, coverage_scale=0.25, annotation_format='webp',
+                 annotation_quality=80, annotation_max_dimension=None, model=None):
+        """
+        Initialize the weed detector with YOLOv8 model.
+        
+        Args:
+            batch_size (int): Number of images per model call in detect_batch.
+            confidence_threshold (float): Minimum confidence for a detection.
+            background_load (bool): Load and warm up the model in a background
+                thread instead of blocking the constructor.
+            backend (str): Inference runtime: 'torch', 'onnx' or 'openvino'.
+                Non-torch backends export the weights once and cache the
+                export next to them.
+            num_threads (int): CPU threads used for inference; None keeps
+                the runtime default.
+            coverage_method (str): Default green coverage estimator for
+                detect_growth_stage: 'full', 'stride' or 'downscale'.
+            coverage_stride (int): Pixel step for the 'stride' estimator.
+            coverage_scale (float): Resize factor for the 'downscale' estimator.
+            annotation_format (str): Encoding of annotated images, 'webp'
+                or 'jpeg'.
+            annotation_quality (int): Encoder quality of annotated images, 1-100.
+            annotation_max_dimension (int): Longest side of annotated images;
+                None keeps the full resolution.
+            model: An already loaded model to use instead of the YOLOv8
+                weights, such as MockYOLO from app.utils.mock_detector. It
+                is called like an ultralytics YOLO model; its model_version
+                attribute, if any, identifies it in result cache keys.
+        """
         # Create models directory if it doesn't exist
         os.makedirs('app/models', exist_ok=True)
         
         # Path to the YOLOv8 model weights
-        model_path = 'app/models/yolov8n.pt'
-        
-        # Download the model if it doesn't exist
-        if not os.path.exists(model_path):
-            # For demonstration, using the pretrained YOLOv8 model
-            # In a real application, you would fine-tune this on weed data
-            print("Downloading YOLOv8 model...")
-            self.model = YOLO('yolov8n.pt')
-            self.model.save(model_path)
-        else:
-            print("Loading existing YOLOv8 model...")
-            self.model = YOLO(model_path)
+        self.model_path = 'app/models/yolov8n.pt'
+        
+        self.backend = backend
+        self.num_threads = num_threads
+        
+        # Identifies the weights (and runtime) in result cache keys
+        self.model_version = os.path.basename(self.model_path)
+        if backend != 'torch':
+            self.model_version = f"{self.model_version}:{backend}"
+        
+        self.batch_size = batch_size
+        self.confidence_threshold = confidence_threshold
+        
+        # The model is shared by request threads and background job workers
+        self._model_lock = threading.Lock()
+        
+        # Model loading state, see load() and is_ready()
+        self._model = None
+        self._load_error = None
+        self._loader = None
+        self._ready = threading.Event()
+        
+        self.coverage_method = coverage_method
+        self.coverage_stride = coverage_stride
+        self.coverage_scale = coverage_scale
+        
+        annotation_extension(annotation_format)  # Reject unknown formats up front
+        self.annotation_format = annotation_format
+        self.annotation_quality = annotation_quality
+        self.annotation_max_dimension = annotation_max_dimension
         
         # Growth stage classifier would be a separate model in a real application
         self.growth_stages = ['Seedling', 'Vegetative', 'Flowering', 'Mature']
+        
+        if model is not None:
+            self.model_version = getattr(model, 'model_version', type(model).__name__)
+            self._model = model
+            self._ready.set()
+        elif background_load:
+            self.load_in_background()
+        else:
+            self.load()
+    
+    @property
+    def model(self):
+        """The loaded YOLOv8 model, waiting for a background load to finish."""
+        if not self._ready.is_set():
+            if self._loader is None:
+                self.load()
+            else:
+                self._ready.wait()
+        
+        if self._load_error is not None:
+            raise RuntimeError(f"Model failed to load: {self._load_error}")
+        return self._model
+    
+    def load(self):
+        """
+        Load the YOLOv8 weights and run a warm-up inference.
+        
+        The ultralytics import happens here so that creating the detector
+        (and the Flask app around it) doesn't pay for importing torch.
+        """
+        try:
+            from ultralytics import YOLO
+            
+            # Download the model if it doesn't exist
+            if not os.path.exists(self.model_path):
+                # For demonstration, using the pretrained YOLOv8 model
+                # In a real application, you would fine-tune this on weed data
+                print("Downloading YOLOv8 model...")
+                model = YOLO('yolov8n.pt')
+                model.save(self.model_path)
+            else:
+                print("Loading existing YOLOv8 model...")
+                model = YOLO(self.model_path)
+            
+            # Switch to the exported model for ONNX Runtime / OpenVINO serving
+            weights_path = prepare_weights(self.model_path, self.backend)
+            if self.backend != 'torch':
+                model = YOLO(weights_path, task='detect')
+            
+            # The first inference initializes the predictor and allocates
+            # buffers; do it now so the first real request is fast. Torch
+            # threads are set before it. ONNX Runtime and OpenVINO threads
+            # are set by rebuilding the session the predictor created, so
+            # the new session is warmed up again.
+            warmup = np.zeros((640, 640, 3), dtype=np.uint8)
+            if self.backend == 'torch':
+                set_thread_count(model, self.backend, weights_path, self.num_threads)
+            model(warmup, conf=self.confidence_threshold, verbose=False)
+            if self.backend != 'torch' and set_thread_count(model, self.backend, weights_path, self.num_threads):
+                model(warmup, conf=self.confidence_threshold, verbose=False)
+            
+            self._model = model
+            
+        except Exception as e:
+            print(f"Error loading YOLOv8 model: {e}")
+            self._load_error = str(e)
+            
+        finally:
+            self._ready.set()
+    
+    def load_in_background(self):
+        """Start loading the model in a daemon thread, if not already started."""
+        if self._loader is None and not self._ready.is_set():
+            self._loader = threading.Thread(target=self.load, name='model-loader', daemon=True)
+            self._loader.start()
+    
+    def is_ready(self):
+        """Return True once the model is loaded and warmed up."""
+        return self._ready.is_set() and self._load_error is None
+    
+    def load_status(self):
+        """
+        Describe the model loading state.
+        
+        Returns:
+            dict: 'status' is 'loading', 'ready' or 'failed', with 'error'
+                set when loading failed.
+        """
+        if not self._ready.is_set():
+            return {'status': 'loading'}
+        if self._load_error is not None:
+            return {'status': 'failed', 'error': self._load_error}
+        return {'status': 'ready'}
+    
+    def verify_backend(self, image, box_tolerance=2.0, conf_tolerance=0.05):
+        """
+        Check that the configured backend matches the PyTorch weights on an image.
+        
+        Args:
+            image (str or ImageFrame): Image to compare on; use one with
+                detections for a meaningful check.
+            box_tolerance (float): Maximum allowed coordinate difference in pixels.
+            conf_tolerance (float): Maximum allowed confidence difference.
+            
+        Returns:
+            dict: 'match' plus the largest differences found.
+        """
+        frame = as_frame(image)
+        with self._model_lock:
+            return check_backend_parity(self.model_path, self.model, frame.image,
+                                        conf=self.confidence_threshold,
+                                        box_tolerance=box_tolerance,
+                                        conf_tolerance=conf_tolerance)
     
-    def detect(self, image_path):
+    def detect(self, image, annotate=True):
         """
         Detect weeds in the image using YOLOv8.
         
         Args:
-            image_path (str): Path to the input image.
+            image (str or ImageFrame): Path to the input image, or an already
+                decoded frame.
+            annotate (bool): Save an annotated copy of the image; see
+                save_annotated_image.
             
         Returns:
             dict: Detection results with bounding boxes and remedies.
         """
         try:
+            # Decode the image once; every stage below reads from this frame
+            frame = as_frame(image)
+            
             # Run YOLOv8 inference
-            results = self.model(image_path, conf=0.25)
+            with self._model_lock:
+                results = self.model(frame.image, conf=self.confidence_threshold)
+            
+            return self._build_detection_results(frame, results, annotate)
             
-            # Process the results
-            detections = []
-            for result in results:
-                boxes = result.boxes.cpu().numpy()
+        except Exception as e:
+            print(f"Error during weed detection: {e}")
+            return {'error': str(e)}
+    
+    def detect_batch(self, images, batch_size=None, annotate=True, tracker=None):
+        """
+        Detect weeds in several images, running the model on whole batches.
+        
+        Args:
+            images (list): Paths to the input images, or decoded frames.
+            batch_size (int): Images per model call. Defaults to the
+                detector's batch_size.
+            annotate (bool): Save an annotated copy of each image. Video
+                frames skip this.
+            tracker (IoUTracker): Treat the images as consecutive frames of
+                one sequence and follow each plant across them. Detections
+                gain a 'track_id', and each track is classified only once.
+            
+        Returns:
+            list: One detection result dict per input image, in input order.
+                Images that fail carry an 'error' key instead.
+        """
+        batch_size = batch_size or self.batch_size
+        outputs = [None] * len(images)
+        
+        # Decode every image up front so one bad file doesn't fail its batch
+        frames = []
+        for index, image in enumerate(images):
+            try:
+                frames.append((index, as_frame(image)))
+            except Exception as e:
+                print(f"Error during weed detection: {e}")
+                outputs[index] = {'error': str(e)}
+        
+        for start in range(0, len(frames), batch_size):
+            batch = frames[start:start + batch_size]
+            try:
+                # One model call per batch; ultralytics returns one result per image
+                with self._model_lock:
+                    results = self.model([frame.image for _, frame in batch],
+                                         conf=self.confidence_threshold)
                 
-                for i, box in enumerate(boxes):
-                    # For demonstration purposes, we're checking if the detected object
-                    # could be a weed (in real app, you'd use a model fine-tuned for weeds)
-                    confidence = float(box.conf[0])
-                    class_id = int(box.cls[0])
-                    class_name = result.names[class_id]
+                for (index, frame), result in zip(batch, results):
+                    outputs[index] = self._build_detection_results(frame, [result], annotate, tracker)
                     
-                    # If the model detects plants or objects that could be weeds
-                    # In a real app, the model would be specifically trained for weed types
-                    weed_type = self._classify_weed_type(image_path, box.xyxy[0])
+            except Exception as e:
+                print(f"Error during batch weed detection: {e}")
+                for index, _ in batch:
+                    outputs[index] = {'error': str(e)}
+        
+        return outputs
+    
+    def detect_tiled(self, source, tile_size=640, overlap=0.2, iou_threshold=0.5, batch_size=None):
+        """
+        Detect weeds in a high-resolution image by running the model on tiles.
+        
+        The image is split into overlapping tiles that are read one batch at
+        a time, so large orthomosaics never have to be fully in memory when
+        a windowed reader is available (see open_tile_reader). Boxes are
+        mapped back to image coordinates and duplicates from overlapping
+        tiles are merged with class-aware NMS.
+        
+        Args:
+            source (str, numpy.ndarray or ImageFrame): Path to the image
+                (GeoTIFF, .npy or any format OpenCV reads) or the image itself.
+            tile_size (int): Tile side length in pixels, matching the model's
+                input size so small weeds are not downscaled.
+            overlap (float): Fraction of each tile shared with its neighbour.
+            iou_threshold (float): IoU above which cross-tile boxes are merged.
+            batch_size (int): Tiles per model call. Defaults to the
+                detector's batch_size.
+            
+        Returns:
+            dict: Detection results in full-image coordinates.
+        """
+        batch_size = batch_size or self.batch_size
+        reader = None
+        
+        try:
+            reader = open_tile_reader(source)
+            tiles = tile_grid(reader.width, reader.height, tile_size, overlap)
+            
+            boxes, scores, classes, weed_types = [], [], [], []
+            for start in range(0, len(tiles), batch_size):
+                batch = tiles[start:start + batch_size]
+                frames = [ImageFrame(reader.read(*window)) for window in batch]
+                
+                with self._model_lock:
+                    results = self.model([frame.image for frame in frames],
+                                         conf=self.confidence_threshold, imgsz=tile_size)
+                
+                for (x, y, _, _), frame, result in zip(batch, frames, results):
+                    tile_boxes = result.boxes.cpu().numpy()
+                    if len(tile_boxes.conf) == 0:
+                        continue
                     
-                    # Only include if it's detected as a weed
-                    if weed_type:
-                        x1, y1, x2, y2 = map(int, box.xyxy[0])
-                        
-                        detection = {
-                            'id': i,
-                            'weed_type': weed_type,
-                            'confidence': confidence,
-                            'bbox': [x1, y1, x2, y2],
-                            'remedy': self._get_remedy(weed_type)
-                        }
-                        detections.append(detection)
-            
-            # Save the annotated image
-            annotated_img_path = self._save_annotated_image(image_path, results)
+                    # Classify against the tile's pixels, then shift to image coordinates
+                    weed_types.extend(self._classify_weed_types(frame, tile_boxes.xyxy))
+                    boxes.append(tile_boxes.xyxy + np.array([x, y, x, y], dtype=tile_boxes.xyxy.dtype))
+                    scores.append(tile_boxes.conf)
+                    classes.append(tile_boxes.cls)
+            
+            detections, remedies = [], {}
+            if boxes:
+                boxes = np.concatenate(boxes)
+                scores = np.concatenate(scores)
+                keep = non_max_suppression(boxes, scores, np.concatenate(classes), iou_threshold)
+                
+                detections, remedies = self._detections_from_arrays(
+                    boxes[keep], scores[keep], [weed_types[index] for index in keep])
             
             return {
                 'detections': detections,
-                'annotated_image': os.path.basename(annotated_img_path)
+                'remedies': remedies,
+                'image_size': [reader.width, reader.height],
+                'tiles': len(tiles)
             }
             
         except Exception as e:
-            print(f"Error during weed detection: {e}")
+            print(f"Error during tiled weed detection: {e}")
             return {'error': str(e)}
+            
+        finally:
+            if reader is not None:
+                reader.close()
     
-    def detect_growth_stage(self, image_path):
+    def _build_detection_results(self, frame, results, annotate=True, tracker=None):
+        """
+        Turn raw YOLOv8 results for one frame into the detection response.
+        
+        Args:
+            frame (ImageFrame): The decoded input image.
+            results: YOLOv8 detection results for this frame.
+            annotate (bool): Save the annotated image and include its name.
+            tracker (IoUTracker): Tracker to match the boxes against; see
+                detect_batch.
+            
+        Returns:
+            dict: Detection results with bounding boxes, and the remedies
+                they refer to under 'remedies'.
+        """
+        detections, remedies = [], {}
+        for result in results:
+            boxes = result.boxes.cpu().numpy()
+            
+            # For demonstration purposes, we're checking if the detected object
+            # could be a weed (in real app, you'd use a model fine-tuned for weeds).
+            # Classify every box in one vectorized pass over the frame
+            if tracker is None:
+                weed_types = self._classify_weed_types(frame, boxes.xyxy)
+            else:
+                tracks = tracker.update(boxes.xyxy, boxes.conf)
+                weed_types = self._classify_tracked(frame, boxes.xyxy, tracks)
+            
+            # Only include boxes detected as a weed
+            keep = np.flatnonzero(np.array(weed_types, dtype=object).astype(bool))
+            
+            result_detections, result_remedies = self._detections_from_arrays(
+                boxes.xyxy[keep], boxes.conf[keep], [weed_types[i] for i in keep], ids=keep)
+            if tracker is not None:
+                for detection, i in zip(result_detections, keep.tolist()):
+                    detection['track_id'] = tracks[i].id if tracks[i] is not None else None
+            detections.extend(result_detections)
+            remedies.update(result_remedies)
+        
+        output = {
+            'detections': detections,
+            'remedies': remedies
+        }
+        
+        # Save the annotated image
+        if annotate:
+            annotated_img_path = self.save_annotated_image(frame, detections)
+            output['annotated_image'] = os.path.basename(annotated_img_path)
+        
+        return output
+    
+    def _detections_from_arrays(self, xyxy, confidences, weed_types, ids=None):
+        """
+        Build detection dicts from whole arrays of boxes.
+        
+        Coordinates are truncated to integers and all values converted to
+        Python numbers one array at a time rather than one box at a time.
+        Each detection refers to its remedy by remedy_id; the remedies
+        themselves are returned once each, keyed by id.
+        
+        Args:
+            xyxy (numpy.ndarray): (N, 4) boxes as [x1, y1, x2, y2].
+            confidences (numpy.ndarray): (N,) detection confidences.
+            weed_types (list): Weed type of each box.
+            ids (array-like): Detection id of each box; defaults to 0..N-1.
+            
+        Returns:
+            tuple: (list of detections, dict of remedy id -> remedy).
+        """
+        bboxes = np.asarray(xyxy).reshape(-1, 4).astype(np.int64).tolist()
+        confidences = np.asarray(confidences, dtype=np.float64).tolist()
+        ids = range(len(bboxes)) if ids is None else np.asarray(ids).tolist()
+        
+        species = get_species_kb()
+        remedy_ids = {weed_type: species.remedy_id(weed_type) for weed_type in set(weed_types)}
+        
+        detections = [
+            {'id': i, 'weed_type': weed_type, 'confidence': confidence, 'bbox': bbox,
+             'remedy_id': remedy_ids[weed_type]}
+            for i, weed_type, confidence, bbox in zip(ids, weed_types, confidences, bboxes)
+        ]
+        remedies = {remedy_id: species.remedies[remedy_id] for remedy_id in set(remedy_ids.values())}
+        return detections, remedies
+    
+    def detect_growth_stage(self, image, run_detection=True, coverage_method=None, annotate=True):
         """
         Detect the growth stage of plants in the image.
         
         Args:
-            image_path (str): Path to the input image.
+            image (str or ImageFrame): Path to the input image, or an already
+                decoded frame.
+            run_detection (bool): Also run weed detection and annotation. When
+                False only the stage is computed and plant_count is None.
+            coverage_method (str): How green coverage is estimated; see
+                estimate_green_coverage. Defaults to the detector's
+                coverage_method.
+            annotate (bool): Save an annotated copy of the image when
+                run_detection is set.
             
         Returns:
             dict: Growth stage detection results.
@@ -97,25 +460,26 @@ class WeedDetector:
             # In a real application, this would use a specialized model
             # For demonstration, we'll use a simulated approach
             
-            # Run object detection first
-            detection_results = self.detect(image_path)
+            frame = as_frame(image)
             
-            if 'error' in detection_results:
-                return {'error': detection_results['error']}
+            # Run object detection first
+            detection_results = None
+            if run_detection:
+                detection_results = self.detect(frame, annotate)
+                
+                if 'error' in detection_results:
+                    return {'error': detection_results['error']}
             
             # Simulate growth stage classification
             # In a real app, this would analyze features of the detected plants
-            image = cv2.imread(image_path)
-            hsv = cv2.cvtColor(image, cv2.COLOR_BGR2HSV)
-            
             # Use color distribution as a simple heuristic for growth stage
             # (Real application would use a more sophisticated approach)
-            green_lower = np.array([35, 50, 50])
-            green_upper = np.array([85, 255, 255])
-            green_mask = cv2.inRange(hsv, green_lower, green_upper)
-            
-            # Calculate percentage of green pixels (simple feature)
-            green_percentage = (np.sum(green_mask > 0) / (image.shape[0] * image.shape[1])) * 100
+            green_percentage, green_error = estimate_green_coverage(
+                frame,
+                method=coverage_method or self.coverage_method,
+                stride=self.coverage_stride,
+                scale=self.coverage_scale
+            )
             
             # Determine growth stage based on green percentage (simplified logic)
             if green_percentage < 5:
@@ -127,73 +491,114 @@ class WeedDetector:
             else:
                 stage = self.growth_stages[3]  # Mature
             
-            return {
+            growth_results = {
                 'growth_stage': stage,
                 'confidence': min(0.9, max(0.6, green_percentage / 30)),  # Simulated confidence
                 'features': {
                     'green_percentage': green_percentage,
-                    'plant_count': len(detection_results.get('detections', [])),
-                },
-                'detections': detection_results
+                    'green_percentage_error': green_error,
+                    'plant_count': len(detection_results.get('detections', [])) if run_detection else None,
+                }
             }
+            if run_detection:
+                growth_results['detections'] = detection_results
+            
+            return growth_results
             
         except Exception as e:
             print(f"Error during growth stage detection: {e}")
             return {'error': str(e)}
     
-    def _classify_weed_type(self, image_path, bbox):
+    def _classify_tracked(self, frame, boxes_xyxy, tracks):
         """
-        Classify the type of weed based on the cropped region.
+        Classify only the boxes whose track has no weed type yet.
         
-        In a real application, this would use a specialized classifier.
-        For demonstration, we're using a simplified approach.
+        New tracks take the type of their first box and keep it, so a
+        plant followed across frames is classified once. Boxes without a
+        track are classified every time.
+        
+        Args:
+            frame (ImageFrame): The decoded input image.
+            boxes_xyxy (array-like): (N, 4) boxes as [x1, y1, x2, y2].
+            tracks (list): The Track, or None, of each box.
+            
+        Returns:
+            list: The weed type of each box, in input order.
+        """
+        pending = [i for i, track in enumerate(tracks) if track is None or track.weed_type is None]
+        weed_types = [track.weed_type if track is not None else None for track in tracks]
+        
+        if pending:
+            boxes = np.asarray(boxes_xyxy).reshape(-1, 4)
+            for i, weed_type in zip(pending, self._classify_weed_types(frame, boxes[pending])):
+                weed_types[i] = weed_type
+                if tracks[i] is not None:
+                    tracks[i].weed_type = weed_type
+        
+        return weed_types
+    
+    def _classify_weed_type(self, frame, bbox):
+        """
+        Classify the type of weed based on the cropped region.
         
         Args:
-            image_path (str): Path to the input image.
+            frame (ImageFrame): The decoded input image.
             bbox (list): Bounding box coordinates [x1, y1, x2, y2].
             
         Returns:
             str: The classified weed type.
         """
-        # Common weed types
-        weed_types = [
-            "Dandelion",
-            "Crabgrass",
-            "Thistle",
-            "Chickweed",
-            "Bindweed",
-            "Nutsedge",
-            "Purslane",
-            "Pigweed",
-            "Wild Mustard",
-            "Foxtail"
-        ]
+        return self._classify_weed_types(frame, [bbox])[0]
+    
+    def _classify_weed_types(self, frame, boxes_xyxy):
+        """
+        Classify the weed type of every bounding box in a frame at once.
         
-        try:
-            # Load the image
-            img = cv2.imread(image_path)
-            x1, y1, x2, y2 = map(int, bbox)
+        In a real application, this would use a specialized classifier.
+        For demonstration, we're using the average hue of each box, read
+        from a summed-area table of the frame's hue channel so the cost per
+        box is constant regardless of its size.
+        
+        Args:
+            frame (ImageFrame): The decoded input image.
+            boxes_xyxy (array-like): Bounding boxes as an (N, 4) array of
+                [x1, y1, x2, y2] coordinates.
             
-            # Crop the region
-            crop = img[y1:y2, x1:x2]
+        Returns:
+            list: The classified weed type for each box, in input order.
+        """
+        boxes = np.asarray(boxes_xyxy, dtype=np.float64).reshape(-1, 4)
+        if len(boxes) == 0:
+            return []
+        
+        try:
+            # Truncate to pixel indices the same way the crop slices would
+            boxes = np.trunc(boxes).astype(np.int64)
+            x1 = np.clip(boxes[:, 0], 0, frame.width)
+            y1 = np.clip(boxes[:, 1], 0, frame.height)
+            x2 = np.clip(boxes[:, 2], 0, frame.width)
+            y2 = np.clip(boxes[:, 3], 0, frame.height)
             
-            # In a real application, a dedicated weed classifier would be used here
-            # For demonstration, we're using color features as a simple heuristic
+            # Sum of hue inside each box from the four integral image corners
+            integral = frame.hue_integral
+            hue_sum = (integral[y2, x2] - integral[y1, x2]
+                       - integral[y2, x1] + integral[y1, x1])
+            area = (x2 - x1) * (y2 - y1)
             
-            # Convert to HSV and get color features
-            hsv = cv2.cvtColor(crop, cv2.COLOR_BGR2HSV)
-            avg_hue = np.mean(hsv[:, :, 0])
+            valid = area > 0
+            avg_hue = np.divide(hue_sum, area, out=np.zeros_like(hue_sum), where=valid)
             
             # Simple heuristic to assign weed type based on average hue
             # (In a real app, this would be a proper classifier)
-            weed_index = int((avg_hue / 180) * len(weed_types))
-            weed_index = max(0, min(weed_index, len(weed_types) - 1))
+            weed_index = (avg_hue / 180 * len(WEED_TYPES)).astype(np.int64)
+            weed_index = np.clip(weed_index, 0, len(WEED_TYPES) - 1)
             
-            return weed_types[weed_index]
+            return [WEED_TYPES[index] if ok else "Unknown Weed"
+                    for index, ok in zip(weed_index.tolist(), valid.tolist())]
             
         except Exception as e:
             print(f"Error in weed classification: {e}")
-            return "Unknown Weed"
+            return ["Unknown Weed"] * len(boxes)
     
     def _get_remedy(self, weed_type):
         """
@@ -205,92 +610,40 @@ class WeedDetector:
         Returns:
             dict: Remedy recommendations.
         """
-        # Dictionary of common weed remedies (simplified)
-        remedies = {
-            "Dandelion": {
-                "organic": "Pull by hand, making sure to remove the entire taproot. Use a dandelion puller tool for efficient removal.",
-                "chemical": "Apply broadleaf herbicide containing 2,4-D or dicamba.",
-                "prevention": "Maintain a dense, healthy lawn by proper watering, mowing, and fertilizing."
-            },
-            "Crabgrass": {
-                "organic": "Pull young plants by hand before they seed. Apply corn gluten meal as a pre-emergent control.",
-                "chemical": "Apply pre-emergent herbicides in early spring before soil temperatures reach 55°F.",
-                "prevention": "Mow lawn at a higher height to shade soil and prevent crabgrass seed germination."
-            },
-            "Thistle": {
-                "organic": "Dig out the entire root system. Repeatedly cutting the plant to deplete root reserves.",
-                "chemical": "Apply broadleaf herbicide containing clopyralid or 2,4-D.",
-                "prevention": "Maintain thick turf and proper soil fertility to prevent establishment."
-            },
-            "Chickweed": {
-                "organic": "Hand-pull plants before they seed. Smother with mulch in garden areas.",
-                "chemical": "Apply post-emergent herbicides containing dicamba or MCPP.",
-                "prevention": "Avoid overwatering and improve soil drainage."
-            },
-            "Bindweed": {
-                "organic": "Persistent removal of all above-ground growth to starve the roots. Cover with mulch or landscape fabric.",
-                "chemical": "Apply herbicides containing dicamba or 2,4-D repeatedly.",
-                "prevention": "Maintain thick turf and use landscape fabric in garden areas."
-            },
-            "Nutsedge": {
-                "organic": "Hand-pull plants, taking care to remove all tubers. Cover area with thick mulch.",
-                "chemical": "Apply herbicides specifically formulated for nutsedge control containing halosulfuron.",
-                "prevention": "Avoid overwatering and improve soil drainage."
-            },
-            "Purslane": {
-                "organic": "Hand-pull entire plants before they seed. Apply thick mulch in garden areas.",
-                "chemical": "Apply pre-emergent herbicides in spring or post-emergent herbicides when plants are young.",
-                "prevention": "Apply mulch to garden beds and maintain thick turf in lawn areas."
-            },
-            "Pigweed": {
-                "organic": "Hand-pull plants before they seed. Use mulch to suppress growth.",
-                "chemical": "Apply post-emergent herbicides containing glyphosate or 2,4-D.",
-                "prevention": "Remove plants before they produce seeds. Maintain thick ground cover."
-            },
-            "Wild Mustard": {
-                "organic": "Hand-pull plants before they flower and seed. Use vinegar-based herbicides on young plants.",
-                "chemical": "Apply broadleaf herbicides containing 2,4-D or MCPA.",
-                "prevention": "Remove plants before they seed and practice crop rotation in garden areas."
-            },
-            "Foxtail": {
-                "organic": "Pull young plants by hand. Apply corn gluten meal as pre-emergent control.",
-                "chemical": "Apply pre-emergent herbicides in spring before germination.",
-                "prevention": "Mow at proper height and maintain thick, healthy turf."
-            }
-        }
-        
-        # Return remedy for the detected weed type, or a generic remedy if not found
-        if weed_type in remedies:
-            return remedies[weed_type]
-        else:
-            return {
-                "organic": "Hand-pull weeds ensuring removal of the entire root system.",
-                "chemical": "Apply a broad-spectrum herbicide according to manufacturer instructions.",
-                "prevention": "Maintain healthy soil and plants to prevent weed establishment."
-            }
+        # Remedies come from the shared species knowledge base, loaded once
+        return get_species_kb().remedy(weed_type)
     
-    def _save_annotated_image(self, image_path, results):
+    def save_annotated_image(self, frame, detections, path=None):
         """
-        Save the annotated image with detection results.
+        Save an image with its detections drawn on it.
+        
+        Boxes are drawn on the BGR frame (downscaled to
+        annotation_max_dimension if set) and encoded straight to the
+        detector's annotation_format and quality.
         
         Args:
-            image_path (str): Path to the original image.
-            results: YOLOv8 detection results.
+            frame (ImageFrame): The decoded original image.
+            detections (list): Detection dicts from detect.
+            path (str): Where to save the image. Defaults to
+                app/static/uploads/<name>_annotated.<ext>.
             
         Returns:
             str: Path to the saved annotated image.
         """
-        # Get the filename without extension
-        filename = os.path.basename(image_path)
-        name, ext = os.path.splitext(filename)
+        if path is None:
+            # Get the filename without extension
+            name = os.path.splitext(frame.name or 'image')[0]
+            path = os.path.join('app/static/uploads',
+                                f"{name}_annotated{annotation_extension(self.annotation_format)}")
         
-        # Path for the annotated image
-        annotated_path = os.path.join('app/static/uploads', f"{name}_annotated{ext}")
+        image = draw_detections(frame.image, detections, self.annotation_max_dimension)
+        data = encode_image(image, self.annotation_format, self.annotation_quality)
         
-        # Get the annotated image from results and save it
-        for r in results:
-            im_array = r.plot()  # Plot a BGR numpy array of predictions
-            im = Image.fromarray(im_array[..., ::-1])  # RGB PIL image
-            im.save(annotated_path)  # Save image
+        # Write to a temporary file first so the image is never served half-written;
+        # the name is per thread so concurrent renders of one image don't collide
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
         
-        return annotated_path 
\ No newline at end of file
+        return path
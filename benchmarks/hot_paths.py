@@ -0,0 +1,275 @@
+"""
+Benchmark the detection, document analysis and report hot paths.
+
+Images of several sizes and box counts and documents of increasing length
+are generated from a fixed seed, so runs on different commits time the
+same work. Results are written as JSON; pass an earlier run to --compare
+to print the change per benchmark.
+
+By default the detector runs on MockYOLO from app/utils/mock_detector.py,
+with no simulated latency, which needs no weights or network. --model yolo
+uses the real YOLOv8 model.
+
+Run from the repository root:
+
+    python -m benchmarks.hot_paths --output before.json
+    python -m benchmarks.hot_paths --output after.json --compare before.json
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+import cv2
+import numpy as np
+from app.utils.image_frame import ImageFrame
+from app.utils.weed_detector import WeedDetector, WEED_TYPES
+from app.utils.mock_detector import MockYOLO
+from app.utils.document_analyzer import process_document_text
+from app.utils.report_generator import _generate_html_report
+from app.utils.species import get_species_kb
+from app.utils.vocabulary import get_default_matcher
+
+# (width, height) of the synthetic images
+IMAGE_SIZES = [(640, 480), (1920, 1080), (4000, 3000)]
+
+# Boxes the mock model returns per image
+BOX_COUNTS = [5, 50, 400]
+
+# Words in the synthetic documents
+DOCUMENT_WORDS = [1000, 10000, 100000]
+
+def synthetic_image(width, height, seed=0):
+    """
+    Make a field-like BGR image: green background with patches of plants and soil.
+
+    Args:
+        width (int): Image width in pixels.
+        height (int): Image height in pixels.
+        seed (int): Random seed.
+
+    Returns:
+        numpy.ndarray: The BGR image.
+    """
+    rng = np.random.default_rng(seed)
+    image = np.empty((height, width, 3), np.uint8)
+    image[:] = (45, 105, 70)
+    for _ in range(width * height // 4000):
+        x, y = int(rng.integers(width)), int(rng.integers(height))
+        color = tuple(int(c) for c in rng.integers((10, 40, 20), (120, 230, 140)))
+        cv2.circle(image, (x, y), int(rng.integers(3, max(4, width // 60))), color, -1)
+
+    # Sensor noise, so encoders and hue statistics see realistic texture
+    noise = rng.integers(-12, 13, image.shape, dtype=np.int16)
+    return np.clip(image.astype(np.int16) + noise, 0, 255).astype(np.uint8)
+
+def classify_crops_per_box(image, boxes_xyxy):
+    """
+    Classify boxes the way the detector did before the hue integral image.
+
+    Each box is cropped and converted to HSV on its own, so the cost grows
+    with the box area. Kept as the baseline for the vectorized classifier.
+
+    Args:
+        image (ndarray): BGR image.
+        boxes_xyxy (array-like): Bounding boxes as [x1, y1, x2, y2] rows.
+
+    Returns:
+        list: The weed type for each box.
+    """
+    weed_types = []
+    for box in boxes_xyxy:
+        x1, y1, x2, y2 = map(int, box)
+        crop = image[y1:y2, x1:x2]
+        if crop.size == 0:
+            weed_types.append("Unknown Weed")
+            continue
+        avg_hue = np.mean(cv2.cvtColor(crop, cv2.COLOR_BGR2HSV)[:, :, 0])
+        index = int(avg_hue / 180 * len(WEED_TYPES))
+        weed_types.append(WEED_TYPES[max(0, min(index, len(WEED_TYPES) - 1))])
+    return weed_types
+
+def synthetic_document(words, seed=0):
+    """
+    Make agronomy-report-like text with weed, growth stage and treatment mentions.
+
+    Args:
+        words (int): Approximate number of words.
+        seed (int): Random seed.
+
+    Returns:
+        str: The document text.
+    """
+    rng = np.random.default_rng(seed)
+    categories = get_default_matcher().categories
+    terms = [term for category in ('weed_mentions', 'growth_stages', 'treatments')
+             for term in categories.get(category, [])]
+    filler = ("the field was surveyed after rain and plots along the north edge "
+              "showed uneven cover with patches of bare soil near the drainage line").split()
+
+    sentences, count = [], 0
+    while count < words:
+        sentence = list(rng.choice(filler, size=int(rng.integers(8, 16))))
+        for _ in range(int(rng.integers(0, 3))):
+            sentence.insert(int(rng.integers(len(sentence))), str(rng.choice(terms)))
+        sentences.append(' '.join(sentence).capitalize() + '.')
+        count += len(sentence)
+
+        # Dates and locations every so often, for the extractors
+        if len(sentences) % 20 == 0:
+            sentences.append(f"Observed on 0{len(sentences) % 9 + 1}/15/2023 at Field {len(sentences) % 7}.")
+    return '\n'.join(' '.join(sentences[i:i + 5]) for i in range(0, len(sentences), 5))
+
+def measure(function, repeat=5, number=1):
+    """
+    Time a function after one warm-up call.
+
+    Args:
+        function (callable): Called with no arguments.
+        repeat (int): Timed rounds.
+        number (int): Calls per round.
+
+    Returns:
+        dict: Milliseconds per call: min, median and mean over the rounds,
+            and the number of rounds.
+    """
+    function()
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            function()
+        times.append((time.perf_counter() - start) * 1000 / number)
+    return {
+        'min_ms': round(min(times), 4),
+        'median_ms': round(statistics.median(times), 4),
+        'mean_ms': round(statistics.mean(times), 4),
+        'rounds': repeat
+    }
+
+def detection_benchmarks(model_name, repeat, output_dir):
+    """Time each stage of detection, classification and growth stage analysis."""
+    results = []
+    annotated_path = os.path.join(output_dir, 'annotated.webp')
+    for boxes in BOX_COUNTS:
+        model = MockYOLO(boxes_per_image=boxes, seed=0, latency='zero') if model_name == 'mock' else None
+        # Annotated images are capped at 1280px, as app.py configures them
+        detector = WeedDetector(model=model, annotation_max_dimension=1280)
+
+        for width, height in IMAGE_SIZES:
+            image = synthetic_image(width, height)
+            encoded = cv2.imencode('.jpg', image, [cv2.IMWRITE_JPEG_QUALITY, 90])[1].tobytes()
+            params = {'width': width, 'height': height, 'boxes': boxes}
+
+            raw = detector.model(image, conf=detector.confidence_threshold)
+            params['boxes'] = len(raw[0].boxes.conf)
+            detections = detector.detect(ImageFrame(image), annotate=False)['detections']
+            xyxy = raw[0].boxes.cpu().numpy().xyxy
+
+            stages = {
+                'detect.decode': lambda: ImageFrame.from_bytes(encoded),
+                'detect.inference': lambda: detector.model(image, conf=detector.confidence_threshold),
+                # A fresh frame each call, so the hue integral is built as in a request
+                'detect.postprocess': lambda: detector._build_detection_results(ImageFrame(image), raw, annotate=False),
+                'detect.annotate': lambda: detector.save_annotated_image(ImageFrame(image), detections,
+                                                                         annotated_path),
+                'detect': lambda: detector.detect(ImageFrame(image), annotate=False),
+                # Crop and convert every box, as classification worked before the hue integral
+                'classify_weed_type.crop_per_box': lambda: classify_crops_per_box(image, xyxy),
+                'classify_weed_type.vectorized': lambda: detector._classify_weed_types(ImageFrame(image), xyxy),
+                'detect_growth_stage': lambda: detector.detect_growth_stage(ImageFrame(image), annotate=False),
+                'detect_growth_stage.stage_only': lambda: detector.detect_growth_stage(ImageFrame(image),
+                                                                                      run_detection=False)
+            }
+
+            for name, function in stages.items():
+                # Stage-only growth analysis doesn't depend on the box count
+                if name == 'detect_growth_stage.stage_only' and boxes != BOX_COUNTS[0]:
+                    continue
+                print(f"{name} {width}x{height} {params['boxes']} boxes", file=sys.stderr)
+                results.append({'name': name, 'params': dict(params), **measure(function, repeat)})
+    return results
+
+def document_benchmarks(repeat):
+    """Time document analysis and report rendering for documents of increasing length."""
+    results = []
+    for words in DOCUMENT_WORDS:
+        text = synthetic_document(words)
+        analysis = process_document_text(text)
+        params = {'words': words, 'characters': len(text)}
+
+        print(f"process_document_text {words} words", file=sys.stderr)
+        results.append({'name': 'process_document_text', 'params': params,
+                        **measure(lambda: process_document_text(text), repeat)})
+
+        print(f"generate_html_report {words} words", file=sys.stderr)
+        results.append({'name': 'generate_html_report', 'params': params,
+                        **measure(lambda: _generate_html_report(analysis, '20230101_000000'), repeat)})
+    return results
+
+def compare(results, baseline):
+    """Print the median time of each benchmark relative to a baseline run."""
+    def key(result):
+        return result['name'], json.dumps(result['params'], sort_keys=True)
+
+    previous = {key(result): result for result in baseline['results']}
+    for result in results:
+        before = previous.get(key(result))
+        if before is None:
+            continue
+        ratio = result['median_ms'] / before['median_ms'] if before['median_ms'] else float('nan')
+        params = ' '.join(f"{k}={v}" for k, v in result['params'].items())
+        print(f"{result['name']:34} {params:40} {before['median_ms']:10.3f} -> "
+              f"{result['median_ms']:10.3f} ms ({ratio:.2f}x)")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--model', choices=('mock', 'yolo'), default='mock',
+                        help='Run detection on the mock model (offline) or the YOLOv8 weights')
+    parser.add_argument('--repeat', type=int, default=5, help='Timed rounds per benchmark')
+    parser.add_argument('--only', choices=('detection', 'documents'), help='Run one group only')
+    parser.add_argument('--output', help='Write the JSON results here instead of stdout')
+    parser.add_argument('--compare', help='Earlier JSON results to compare against')
+    args = parser.parse_args()
+
+    # Load the species and vocabulary files before anything is timed
+    get_species_kb()
+    get_default_matcher()
+
+    results = []
+    if args.only in (None, 'detection'):
+        with tempfile.TemporaryDirectory() as output_dir:
+            results.extend(detection_benchmarks(args.model, args.repeat, output_dir))
+    if args.only in (None, 'documents'):
+        results.extend(document_benchmarks(args.repeat))
+
+    report = {
+        'meta': {
+            'created_at': datetime.now(timezone.utc).isoformat(),
+            'model': args.model,
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'processor': platform.processor(),
+            'numpy': np.__version__,
+            'opencv': cv2.__version__
+        },
+        'results': results
+    }
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+    if args.compare:
+        with open(args.compare, 'r') as f:
+            compare(results, json.load(f))
+
+if __name__ == '__main__':
+    main()
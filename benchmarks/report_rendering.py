@@ -0,0 +1,104 @@
+"""
+Benchmark the report renderer against the previous renderer in git history.
+
+The previous renderer is read from an earlier commit with `git show`, so the
+comparison is against the code that actually shipped rather than a copy.
+By default that is the repository's first commit, whose renderer built the
+whole report by string concatenation; pass --baseline to pick another
+commit.
+
+The output is not meant to be identical. Compared with the first commit the
+current report:
+
+- adds a Scientific Name column to the weed table,
+- takes recommendations from the species knowledge base,
+- HTML-escapes every value taken from the analysis or the knowledge base.
+
+Pass --diff to print the difference for one sample analysis.
+
+The two renderers are timed in alternating blocks and the median ratio is
+reported, so load on the machine affects both alike.
+
+Run from the repository root:
+
+    python -m benchmarks.report_rendering
+    python -m benchmarks.report_rendering --baseline <commit> --diff
+"""
+import argparse
+import difflib
+import statistics
+import subprocess
+import time
+import types
+from app.utils.document_analyzer import process_document_text, simulate_pdf_extraction, simulate_docx_extraction
+from app.utils.report_generator import _generate_html_report
+
+# Module holding the renderer in earlier commits
+RENDERER_PATH = 'app/utils/report_generator.py'
+
+def sample_analyses():
+    """Return analyses covering full, partial and empty reports."""
+    return [
+        process_document_text(simulate_pdf_extraction()),
+        process_document_text(simulate_docx_extraction()),
+        process_document_text(simulate_pdf_extraction() + simulate_docx_extraction()),
+        process_document_text("No weeds here."),
+        {}
+    ]
+
+def load_baseline(revision):
+    """
+    Load the report renderer from an earlier commit.
+
+    Args:
+        revision (str): Git revision; None for the repository's first commit.
+
+    Returns:
+        callable: The commit's _generate_html_report(analysis, timestamp).
+    """
+    if revision is None:
+        revision = subprocess.check_output(
+            ['git', 'rev-list', '--max-parents=0', 'HEAD'], text=True).split()[0]
+    source = subprocess.check_output(['git', 'show', f'{revision}:{RENDERER_PATH}'], text=True)
+    module = types.ModuleType(f'report_generator_{revision}')
+    exec(compile(source, f'{revision}:{RENDERER_PATH}', 'exec'), module.__dict__)
+    return module._generate_html_report
+
+def render_seconds(render, analyses, iterations):
+    """Render every analysis `iterations` times and return the elapsed time."""
+    start = time.perf_counter()
+    for _ in range(iterations):
+        for analysis in analyses:
+            render(analysis, '20230101_000000')
+    return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--baseline', help="Commit to compare against (default: the first commit)")
+    parser.add_argument('--iterations', type=int, default=200, help="Renders of each analysis per block")
+    parser.add_argument('--blocks', type=int, default=100, help="Alternating blocks per renderer")
+    parser.add_argument('--diff', action='store_true', help="Print the output difference for one analysis")
+    args = parser.parse_args()
+
+    baseline = load_baseline(args.baseline)
+    analyses = sample_analyses()
+
+    if args.diff:
+        before = baseline(analyses[0], 'T').splitlines()
+        after = _generate_html_report(analyses[0], 'T').splitlines()
+        for line in difflib.unified_diff(before, after, 'baseline', 'current', lineterm=''):
+            print(line)
+
+    baseline_times = []
+    current_times = []
+    for _ in range(args.blocks):
+        baseline_times.append(render_seconds(baseline, analyses, args.iterations))
+        current_times.append(render_seconds(_generate_html_report, analyses, args.iterations))
+
+    reports = args.iterations * len(analyses)
+    ratio = statistics.median(b / c for b, c in zip(baseline_times, current_times))
+    print(f"baseline: {reports / statistics.median(baseline_times):10.0f} reports/sec")
+    print(f"current:  {reports / statistics.median(current_times):10.0f} reports/sec ({ratio:.2f}x)")
+
+if __name__ == '__main__':
+    main()
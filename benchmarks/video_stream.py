@@ -0,0 +1,81 @@
+"""
+Measure sustained frames/sec and end-to-end latency of video detection on CPU.
+
+Without --video a synthetic field video is generated: a textured strip
+that pans for a while and then holds still, so both the detector and the
+frame sampler's skipping are exercised. Latency runs from the moment a
+frame is decoded to the moment its result is ready.
+
+Run from the repository root:
+
+    python -m benchmarks.video_stream
+    python -m benchmarks.video_stream --video field.mp4 --batch-size 4
+"""
+import argparse
+import json
+import os
+import tempfile
+import cv2
+import numpy as np
+from app.utils.video_stream import process_stream
+from app.utils.weed_detector import WeedDetector
+
+def synthetic_video(path, frames=300, size=(640, 480), fps=30, pan=6):
+    """
+    Write a video that alternates between panning and holding still.
+
+    Args:
+        path (str): Output .mp4 path.
+        frames (int): Number of frames.
+        size (tuple): (width, height) of the frames.
+        fps (int): Frame rate written to the file.
+        pan (int): Pixels the view moves per frame while panning.
+    """
+    width, height = size
+    rng = np.random.default_rng(0)
+
+    # Green field with darker and lighter patches, wide enough to pan across
+    field = np.zeros((height, width + frames * pan, 3), np.uint8)
+    field[:] = (40, 110, 60)
+    for _ in range(field.shape[1] // 8):
+        x, y = int(rng.integers(field.shape[1])), int(rng.integers(height))
+        color = tuple(int(c) for c in rng.integers((20, 60, 20), (90, 220, 110)))
+        cv2.circle(field, (x, y), int(rng.integers(4, 24)), color, -1)
+
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'mp4v'), fps, size)
+    offset = 0
+    for index in range(frames):
+        # Pan for two seconds, then hold for one
+        if (index // fps) % 3 != 2:
+            offset += pan
+        writer.write(np.ascontiguousarray(field[:, offset:offset + width]))
+    writer.release()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--video', help='Video to process instead of a synthetic one')
+    parser.add_argument('--frames', type=int, default=300, help='Length of the synthetic video')
+    parser.add_argument('--batch-size', type=int, default=8)
+    parser.add_argument('--threshold', type=float, default=4.0, help='Frame change threshold')
+    parser.add_argument('--max-gap', type=int, default=30)
+    args = parser.parse_args()
+
+    detector = WeedDetector(batch_size=args.batch_size)
+
+    path = args.video
+    if path is None:
+        fd, path = tempfile.mkstemp(suffix='.mp4')
+        os.close(fd)
+        synthetic_video(path, args.frames)
+
+    try:
+        for item in process_stream(detector, path, change_threshold=args.threshold,
+                                   max_gap=args.max_gap):
+            if 'summary' in item:
+                print(json.dumps(item['summary'], indent=2))
+    finally:
+        if args.video is None:
+            os.remove(path)
+
+if __name__ == '__main__':
+    main()